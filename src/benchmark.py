@@ -0,0 +1,7 @@
+#!/usr/bin/env python
+import os, sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules'))
+from driver import main
+
+main('benchmark')
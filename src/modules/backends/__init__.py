@@ -0,0 +1,19 @@
+import importlib
+
+# Backend name -> (module, class). Modules are imported only when a backend
+# is used, so a run needs only the drivers of the backends it benchmarks.
+BACKENDS = {
+    "mysql": ("backends.mysqlbackend", "MySQLBackend"),
+    "pgsql": ("backends.pgsqlbackend", "PostgresBackend"),
+    "pgjson": ("backends.pgjsonbackend", "PostgresJsonBackend"),
+    "pgjsonb": ("backends.pgjsonbackend", "PostgresJsonbBackend"),
+    "mongo": ("backends.mongobackend", "MongoBackend"),
+    "memory": ("backends.memorybackend", "MemoryBackend"),
+}
+
+def loadBackend(name, args):
+    if name not in BACKENDS:
+        raise ValueError("Unknown backend " + name + "; expected one of " + ', '.join(sorted(BACKENDS)))
+    moduleName, className = BACKENDS[name]
+    module = importlib.import_module(moduleName)
+    return getattr(module, className)(args)
@@ -0,0 +1,236 @@
+import time
+from result import Result
+from snpreader import SnpReader, LociReader, chromosomeFilePaths
+from docstream import streamDocuments, newDocument, newLocus
+import manifest, delta
+
+# Index result fields, in creation order, and the fields for their sizes
+INDEX_FIELDS = ['idxRsid', 'idxClinSig', 'idxGene']
+INDEX_SIZE_FIELDS = ['idxRsidBytes', 'idxClinSigBytes', 'idxGeneBytes']
+
+class Backend:
+    # Storage engine plugin for the benchmark driver. Subclasses import
+    # their database driver inside connect(), set label (the method prefix
+    # in results) and implement the methods that raise NotImplementedError.
+    label = ''
+    # Name of the local database server process, for resource sampling
+    serverProcess = None
+    # Result fields of the backend's indexes and of their sizes, in
+    # creation order
+    indexFields = INDEX_FIELDS
+    indexSizeFields = INDEX_SIZE_FIELDS
+    # Whether chromosomes can be loaded by separate connections in worker
+    # processes (--jobs)
+    parallelLoad = True
+
+    def __init__(self, args):
+        self.args = args
+        self.sampler = None
+        self.profiler = None
+        self.tag = args.tag or ''
+        self.databaseName = args.db or 'snp_research'
+        # Keep loaded data and its load manifest instead of starting over,
+        # to resume a load or to apply a delta to it
+        self.resume = args.resume or args.delta
+        self.fingerprintDir = args.fingerprints or delta.FINGERPRINT_DIR
+        # Assemble documents while streaming the data files
+        self.streamLoad = args.streamload
+        # {chromosome: first SNP primary key} reserved for a parallel load
+        self.idRanges = None
+        # Extra result rows (per writer thread) and per-batch latency rows
+        # of the last chromosome loaded
+        self.workerResults = []
+        self.batchRows = []
+
+    def newResult(self, method, chromosome=''):
+        result = Result()
+        result.method = self.label + method
+        result.tag = self.tag
+        result.chromosome = chromosome
+        return result
+
+    def markPhase(self, phase):
+        # Label resource samples and profiles with the load phase that is
+        # starting
+        if self.sampler is not None:
+            self.sampler.phase(phase)
+        if self.profiler is not None:
+            self.profiler.phase(self.label + "-" + phase)
+
+    def connect(self):
+        raise NotImplementedError
+
+    def createSchema(self):
+        # Create the tables and the load manifest; clear the manifest (or
+        # the whole database) and forgetFingerprints() unless resuming
+        raise NotImplementedError
+
+    def forgetFingerprints(self, curChr=None):
+        # A load without --delta replaces the rows the stored fingerprints
+        # describe, so they are removed: those of curChr, or those of every
+        # chromosome when the database starts over
+        if curChr is None:
+            delta.removeAllFingerprints(self.fingerprintDir, self.label, self.databaseName)
+        else:
+            delta.removeFingerprints(delta.fingerprintFilePath(self.fingerprintDir, self.label, self.databaseName, curChr))
+
+    def manifestStates(self):
+        # {chromosome: state} from the load manifest
+        raise NotImplementedError
+
+    def markLoading(self, curChr):
+        # Mark a chromosome LOADING in the manifest and commit the mark
+        raise NotImplementedError
+
+    def recordFingerprints(self, curChr, path):
+        # Fingerprint a chromosome loaded in full from path, so that a later
+        # --delta compares against it instead of replacing every SNP
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+        documents = delta.readDocuments(curSnpFilePath, curLociFilePath)
+        delta.writeFingerprints(delta.fingerprintFilePath(self.fingerprintDir, self.label, self.databaseName, curChr),
+                                delta.documentFingerprints(documents))
+
+    def removeChromosome(self, curChr):
+        # Delete the rows of a half-loaded chromosome
+        raise NotImplementedError
+
+    def resumeChromosomes(self, chromosomes):
+        # Chromosomes still to load, after removing the rows of any that the
+        # manifest records as half loaded (or of all of them if it is empty)
+        pending, halfLoaded = manifest.resumeChromosomes(chromosomes, self.manifestStates())
+        for curChr in halfLoaded:
+            self.removeChromosome(curChr)
+        return pending
+
+    def loadChromosome(self, curChr, path):
+        # Load one chromosome from the data files under path, return its
+        # Result. forgetFingerprints(curChr), then mark it LOADING in the
+        # manifest before its first rows and DONE with (or after) its last
+        # rows. Use the SNP keys reserved in idRanges when
+        # it is set.
+        raise NotImplementedError
+
+    def reserveIds(self, chromosomes, path):
+        # Set idRanges before a parallel load, for backends that assign SNP
+        # primary keys client-side
+        return
+
+    def finishLoad(self):
+        # Called once every chromosome of a parallel load is loaded
+        self.idRanges = None
+
+    def loadDocuments(self, curChr, path, result):
+        # SNP/loci documents of a chromosome, as (documents, snps, loci).
+        # Without streamLoad both files are read into a dictionary first,
+        # timed as the SNP and loci load; with it, documents are assembled
+        # from both files as they are inserted.
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+        snps = SnpReader(curSnpFilePath)
+        loci = LociReader(curLociFilePath)
+        if self.streamLoad:
+            return streamDocuments(snps, loci), snps, loci
+
+        documents = {}
+        self.markPhase("snpLoad")
+        result.snpLoadStart = time.time()
+        for snp in snps:
+            documents[snp.rsid] = newDocument(snp)
+        result.snpLoadEnd = time.time()
+
+        self.markPhase("lociLoad")
+        result.lociLoadStart = time.time()
+        for locus in loci:
+            if locus.rsid in documents:
+                documents[locus.rsid]["loci"].append(newLocus(locus))
+        result.lociLoadEnd = time.time()
+        result.totalDocuments = len(documents)
+        return documents.itervalues(), snps, loci
+
+    def streamedCounts(self, snps, loci, result):
+        # Parsing is interleaved with the inserts when streaming, so report
+        # the readers' own time and count
+        if self.streamLoad:
+            result.snpLoadTime = snps.parseTime
+            result.lociLoadTime = loci.parseTime
+            result.totalDocuments = snps.count
+
+    def deltaChromosome(self, curChr, path):
+        # Apply only the changes between a chromosome's stored fingerprints
+        # and its data files under path, return its Result. Fingerprints are
+        # used only if the manifest records the chromosome as loaded; without
+        # them the chromosome's rows are replaced (every SNP is an insert).
+        result = self.newResult("-Delta", str(curChr))
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+        fingerprintFilePath = delta.fingerprintFilePath(self.fingerprintDir, self.label, self.databaseName, curChr)
+
+        self.markPhase("deltaCompare")
+        compareStart = time.time()
+        oldFingerprints = None
+        if self.manifestStates().get(str(curChr)) == manifest.DONE:
+            oldFingerprints = delta.readFingerprints(fingerprintFilePath)
+        documents = delta.readDocuments(curSnpFilePath, curLociFilePath)
+        changes = delta.compareChromosome(documents, oldFingerprints)
+        result.deltaCompareTime = time.time() - compareStart
+
+        # The stored fingerprints stop describing the database once changes
+        # are applied, so a failed delta is redone as a replace. Mark LOADING
+        # before removing any rows, so a crash between the two is resumed.
+        delta.removeFingerprints(fingerprintFilePath)
+        self.markLoading(curChr)
+        if oldFingerprints is None:
+            self.removeChromosome(curChr)
+        self.markPhase("deltaApply")
+        self.applyDelta(curChr, changes, result)
+        delta.writeFingerprints(fingerprintFilePath, changes.fingerprints)
+
+        result.deltaInserts = len(changes.inserts)
+        result.deltaUpdates = len(changes.updates)
+        result.deltaDeletes = len(changes.deletes)
+        return result
+
+    def applyDelta(self, curChr, changes, result):
+        # Apply a ChromosomeDelta in batches and set the delta times of
+        # result. The chromosome is already marked LOADING; mark it DONE with
+        # (or after) the last change.
+        raise NotImplementedError
+
+    def indexStatements(self):
+        # One callable per indexFields entry
+        raise NotImplementedError
+
+    def createIndexes(self):
+        result = self.newResult("-Idx")
+        for field, createIndex in zip(self.indexFields, self.indexStatements()):
+            self.markPhase(field)
+            idxStart = time.time()
+            createIndex()
+            setattr(result, field, time.time() - idxStart)
+        for field, size in zip(self.indexSizeFields, self.indexSizes()):
+            setattr(result, field, size)
+        return result
+
+    def indexSizes(self):
+        # Bytes used by each indexFields index, None where unknown
+        return [None] * len(self.indexSizeFields)
+
+    def runQuery(self, queryType, params):
+        # Run one query of queryType (a Result query field) and fetch all of
+        # its results, so the timing covers the whole round trip
+        raise NotImplementedError
+
+    def lookupRsids(self, rsids, chunkSize, mode, stream):
+        # Look up a list of distinct rsids in chunks of chunkSize and yield
+        # (rsid, row) for each row found, rows as qryByRsid returns them;
+        # a SNP without loci still yields one row, so it counts as found.
+        # mode is a LOOKUP_MODES entry for the SQL backends; with stream,
+        # rows are yielded as they arrive rather than per completed query.
+        raise NotImplementedError
+
+    def resultChromosomes(self, queryType, params, rows):
+        # Chromosomes the rows of a query were read from, for the query
+        # cache. None if the result may depend on any chromosome: counts,
+        # and lookups that found nothing.
+        return None
+
+    def close(self):
+        return
@@ -0,0 +1,122 @@
+import time
+from backends.base import Backend
+from snpreader import SnpReader, LociReader, chromosomeFilePaths
+from snpindex import SnpIndex
+from manifest import LOADING, DONE
+
+# SnpIndex per database name, shared by every connection in the process.
+# Load generator clients connect after the load and query the same engine;
+# client processes see it through fork.
+ENGINES = {}
+
+def documentLoci(doc):
+    return [(locus["mrna_acc"], locus["gene"], locus["class"]) for locus in doc["loci"]]
+
+class MemoryBackend(Backend):
+    # No-database baseline: the data files are loaded into a SnpIndex in
+    # this process and queries are answered from its indexes, which are
+    # built as the SNPs are loaded
+    label = "Memory"
+    # Worker processes would load into their own copy of the engine
+    parallelLoad = False
+
+    def connect(self):
+        if self.databaseName not in ENGINES:
+            ENGINES[self.databaseName] = SnpIndex()
+        self.engine = ENGINES[self.databaseName]
+
+    def createSchema(self):
+        if not self.resume:
+            self.engine = ENGINES[self.databaseName] = SnpIndex()
+            self.forgetFingerprints()
+
+    def manifestStates(self):
+        return dict(self.engine.states)
+
+    def markLoading(self, curChr):
+        self.engine.states[str(curChr)] = LOADING
+
+    def removeChromosome(self, curChr):
+        self.engine.removeChromosome(str(curChr))
+
+    def loadChromosome(self, curChr, path):
+        result = self.newResult("-Index", str(curChr))
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+
+        self.markPhase("snpLoad")
+        result.snpLoadStart = time.time()
+        snps = list(SnpReader(curSnpFilePath))
+        result.snpLoadEnd = time.time()
+
+        # Loci of each SNP, as (mrna_acc, gene, class)
+        self.markPhase("lociLoad")
+        result.lociLoadStart = time.time()
+        loci = {}
+        for locus in LociReader(curLociFilePath):
+            loci.setdefault(locus.rsid, []).append((locus.mrnaAcc, locus.gene, locus.locusClass))
+        result.lociLoadEnd = time.time()
+
+        self.forgetFingerprints(curChr)
+        self.engine.states[str(curChr)] = LOADING
+        self.markPhase("documentInsert")
+        result.documentInsertStart = time.time()
+        totalDocuments = 0
+        for snp in snps:
+            if snp.rsid not in self.engine.ordinals:
+                self.engine.addSnp(snp.rsid, snp.chr, snp.hasSig, loci.get(snp.rsid, []))
+                totalDocuments += 1
+        result.documentInsertEnd = time.time()
+        result.totalDocuments = totalDocuments
+        self.engine.states[str(curChr)] = DONE
+        return result
+
+    def applyDelta(self, curChr, changes, result):
+        # An update is a remove and an add under a new ordinal
+        engine = self.engine
+        deleteStart = time.time()
+        for rsid in changes.deletes:
+            engine.removeSnp(rsid)
+        result.deltaDeleteTime = time.time() - deleteStart
+
+        updateStart = time.time()
+        for doc in changes.updates:
+            engine.removeSnp(doc["rsid"])
+            engine.addSnp(doc["rsid"], doc["chr"], doc["has_sig"], documentLoci(doc))
+        result.deltaUpdateTime = time.time() - updateStart
+
+        insertStart = time.time()
+        for doc in changes.inserts:
+            engine.addSnp(doc["rsid"], doc["chr"], doc["has_sig"], documentLoci(doc))
+        result.deltaInsertTime = time.time() - insertStart
+        engine.states[str(curChr)] = DONE
+
+    def indexStatements(self):
+        # The indexes are maintained during the load
+        return [lambda: None, lambda: None, lambda: None]
+
+    def indexSizes(self):
+        return self.engine.indexSizes()
+
+    def runQuery(self, queryType, params):
+        # ClinSig counts SNPs, as the document backends do
+        if queryType == 'qryByRsid':
+            return self.engine.snpRows(params["rsid"])
+        if queryType == 'qryByClinSig':
+            return self.engine.countSig()
+        if queryType == 'qryByGene':
+            return self.engine.countGene(params["gene"])
+        if queryType == 'qryByGeneSig':
+            return self.engine.countGeneSig(params["gene"])
+        raise ValueError("Unknown query type " + queryType)
+
+    def lookupRsids(self, rsids, chunkSize, mode, stream):
+        # Hash index probes; there is no round trip to batch
+        for rsid in rsids:
+            for row in self.engine.lookupRows(rsid):
+                yield rsid, row
+
+    def resultChromosomes(self, queryType, params, rows):
+        # snpRows rows are (rsid, chr, has_sig, mrna_acc, gene, class)
+        if queryType == 'qryByRsid' and rows:
+            return set([row[1] for row in rows])
+        return None
@@ -0,0 +1,245 @@
+import json, subprocess, time
+from backends.base import Backend
+from snpreader import batches
+from docstream import documentBatches
+from writerpool import WriterPool
+from manifest import mongoManifestStates, markMongoChromosome, deleteDocuments, MANIFEST_NAME, LOADING, DONE
+
+def insertBatch(collection, batch):
+    # Unordered insert so one failed document does not stop the batch
+    if hasattr(collection, 'insert_many'):
+        collection.insert_many(batch, ordered=False)
+    else:
+        collection.insert(batch, continue_on_error=True)
+
+def insertDocument(collection, doc):
+    if hasattr(collection, 'insert_one'):
+        collection.insert_one(doc)
+    else:
+        collection.insert(doc)
+
+def insertDocuments(collection, documents):
+    # One ordered insert of every document
+    if hasattr(collection, 'insert_many'):
+        collection.insert_many(documents)
+    else:
+        collection.insert(documents)
+
+def replaceBatch(collection, batch):
+    # Upsert whole documents by rsid, in one round trip where the driver
+    # has bulk_write
+    if hasattr(collection, 'bulk_write'):
+        from pymongo import ReplaceOne
+        collection.bulk_write([ReplaceOne({"rsid": doc["rsid"]}, doc, upsert=True) for doc in batch], ordered=False)
+    else:
+        for doc in batch:
+            collection.update({"rsid": doc["rsid"]}, doc, upsert=True)
+
+def setBatchLatencies(result, batchLatencies):
+    result.totalBatches = len(batchLatencies)
+    if batchLatencies:
+        result.batchLatencyMean = sum(batchLatencies)/len(batchLatencies)
+        result.batchLatencyMax = max(batchLatencies)
+
+def countDocuments(collection, query):
+    if hasattr(collection, 'count_documents'):
+        return collection.count_documents(query)
+    return collection.find(query).count()
+
+class MongoBackend(Backend):
+    # One SNP/loci document per SNP, inserted in unordered batches (from
+    # writer threads with workers), all in one call (bulk), one per call
+    # (single), or piped to mongoimport
+    label = "Mongo"
+    serverProcess = "mongod"
+
+    def __init__(self, args):
+        Backend.__init__(self, args)
+        self.mongoHost = args.ohost or 'mongodb://localhost:27017/'
+        self.collectionName = args.coll or 'snps'
+        self.batchSize = args.batch or 1000
+        self.batchBytes = args.batchbytes
+        self.workers = args.workers or 0
+        self.mongoimport = args.mongoimport
+        self.numInsertionWorkers = args.numInsertionWorkers or 0
+        # Batch options select batched inserts whatever the insert mode
+        self.insertMode = args.mongoload or 'batch'
+        if args.batch is not None or args.batchbytes is not None or self.workers > 0:
+            self.insertMode = 'batch'
+
+    def connect(self):
+        import pymongo # https://pypi.python.org/pypi/pymongo/
+        # Writer threads share the client's connection pool, sized for them
+        # and the loading thread. pymongo 2.x spells the option max_pool_size.
+        poolOption = 'maxPoolSize'
+        if pymongo.version_tuple[0] < 3:
+            poolOption = 'max_pool_size'
+        self.client = pymongo.MongoClient(self.mongoHost, **{poolOption: self.workers + 1})
+        self.collection = self.client[self.databaseName][self.collectionName]
+        self.manifestCollection = self.client[self.databaseName][MANIFEST_NAME]
+
+    def createSchema(self):
+        # Collections are created on first insert
+        if not self.resume:
+            deleteDocuments(self.manifestCollection, {})
+            self.forgetFingerprints()
+
+    def manifestStates(self):
+        return mongoManifestStates(self.manifestCollection)
+
+    def markLoading(self, curChr):
+        markMongoChromosome(self.manifestCollection, str(curChr), LOADING)
+
+    def removeChromosome(self, curChr):
+        deleteDocuments(self.collection, {"chr": curChr})
+
+    def loadChromosome(self, curChr, path):
+        method = "-Batch" + str(self.batchSize)
+        if self.insertMode == 'bulk':
+            method = "-Bulk"
+        elif self.insertMode == 'single':
+            method = "-Insert"
+        if self.mongoimport:
+            method = "-jsonImport"
+            if self.numInsertionWorkers > 0:
+                method += str(self.numInsertionWorkers)
+        if self.workers > 0:
+            method += "-Workers" + str(self.workers)
+        if self.streamLoad:
+            method += "-Stream"
+        result = self.newResult(method, str(curChr))
+        self.workerResults = []
+        self.batchRows = []
+        documents, snps, loci = self.loadDocuments(curChr, path, result)
+
+        self.forgetFingerprints(curChr)
+        markMongoChromosome(self.manifestCollection, str(curChr), LOADING)
+        self.markPhase("documentInsert")
+        result.documentInsertStart = time.time()
+        if self.mongoimport:
+            self.importDocuments(documents)
+        elif self.workers > 0:
+            self.insertFromWorkers(curChr, documents, result)
+        elif self.insertMode == 'bulk':
+            insertDocuments(self.collection, list(documents))
+        elif self.insertMode == 'single':
+            for curDoc in documents:
+                insertDocument(self.collection, curDoc)
+        else:
+            batchLatencies = []
+            for batch, estBytes in documentBatches(documents, self.batchSize, self.batchBytes):
+                batchStart = time.time()
+                insertBatch(self.collection, batch)
+                batchLatency = time.time() - batchStart
+                batchLatencies.append(batchLatency)
+                self.batchRows.append([str(curChr), str(len(batchLatencies)), str(len(batch)), str(estBytes), str(batchLatency), '-'])
+            setBatchLatencies(result, batchLatencies)
+        result.documentInsertEnd = time.time()
+        self.streamedCounts(snps, loci, result)
+        # No transaction around the inserts; DONE once all of them returned
+        markMongoChromosome(self.manifestCollection, str(curChr), DONE, result.totalDocuments)
+        return result
+
+    def insertFromWorkers(self, curChr, documents, result):
+        # Writer threads insert while this thread keeps assembling batches;
+        # each thread also gets a result row with its own throughput
+        writerPool = WriterPool(lambda batch: insertBatch(self.collection, batch), self.workers)
+        for batch, estBytes in documentBatches(documents, self.batchSize, self.batchBytes):
+            writerPool.submit(batch, estBytes)
+        writerPool.close()
+        batchLatencies = []
+        for stats in writerPool.stats:
+            for sequence, batchDocs, estBytes, batchLatency in stats.batches:
+                batchLatencies.append(batchLatency)
+                self.batchRows.append([str(curChr), str(sequence), str(batchDocs), str(estBytes), str(batchLatency), str(stats.workerId)])
+            workerResult = self.newResult("", str(curChr))
+            workerResult.method = result.method + "-Worker" + str(stats.workerId)
+            workerResult.totalDocuments = stats.items
+            workerResult.documentInsertTime = stats.busyTime
+            setBatchLatencies(workerResult, [batch[3] for batch in stats.batches])
+            self.workerResults.append(workerResult)
+        setBatchLatencies(result, batchLatencies)
+
+    def importDocuments(self, documents):
+        # mongoimport reads from stdin when no file is given, so documents
+        # are serialized and imported concurrently with no file on disk
+        importCommand = ["mongoimport", "--host", self.mongoHost.rstrip('/').replace("mongodb://",""), "--db", self.databaseName, "--collection", self.collectionName]
+        if self.numInsertionWorkers > 0:
+            importCommand += ["--numInsertionWorkers", str(self.numInsertionWorkers)]
+        importProcess = subprocess.Popen(importCommand, stdin=subprocess.PIPE, bufsize=1024 * 1024)
+        # A write or close fails with EPIPE if mongoimport exits early; its
+        # exit status then says why
+        writeError = None
+        try:
+            for curDoc in documents:
+                importProcess.stdin.write(json.dumps(curDoc) + '\n')
+        except IOError as e:
+            writeError = e
+        try:
+            importProcess.stdin.close()
+        except IOError as e:
+            writeError = writeError or e
+        status = importProcess.wait()
+        # The chromosome stays LOADING, so --resume reloads it
+        if status != 0:
+            raise RuntimeError("mongoimport exited with status " + str(status))
+        if writeError is not None:
+            raise RuntimeError("mongoimport stopped reading documents: " + str(writeError))
+
+    def applyDelta(self, curChr, changes, result):
+        # Updates are upserts of whole documents; like the load, DONE once
+        # every change has returned
+        deleteStart = time.time()
+        for batch in batches(changes.deletes, self.batchSize):
+            deleteDocuments(self.collection, {"rsid": {"$in": batch}})
+        result.deltaDeleteTime = time.time() - deleteStart
+
+        updateStart = time.time()
+        for batch in batches(changes.updates, self.batchSize):
+            replaceBatch(self.collection, batch)
+        result.deltaUpdateTime = time.time() - updateStart
+
+        insertStart = time.time()
+        for batch, estBytes in documentBatches(changes.inserts, self.batchSize):
+            insertBatch(self.collection, batch)
+        result.deltaInsertTime = time.time() - insertStart
+        markMongoChromosome(self.manifestCollection, str(curChr), DONE, len(changes.fingerprints))
+
+    def indexStatements(self):
+        return [lambda: self.collection.create_index("rsid", unique=True),
+                lambda: self.collection.create_index("has_sig"),
+                lambda: self.collection.create_index("loci.gene")]
+
+    def indexSizes(self):
+        sizes = self.client[self.databaseName].command("collstats", self.collectionName)["indexSizes"]
+        return [sizes.get(name) for name in ['rsid_1', 'has_sig_1', 'loci.gene_1']]
+
+    def runQuery(self, queryType, params):
+        # find() is lazy, so the rsid lookup is materialized to time the fetch
+        if queryType == 'qryByRsid':
+            return list(self.collection.find({"rsid":params["rsid"]}))
+        if queryType == 'qryByClinSig':
+            return countDocuments(self.collection, {"has_sig":True})
+        if queryType == 'qryByGene':
+            return countDocuments(self.collection, {"loci.gene":params["gene"]})
+        if queryType == 'qryByGeneSig':
+            return countDocuments(self.collection, {"has_sig":True,"loci.gene":params["gene"]})
+        raise ValueError("Unknown query type " + queryType)
+
+    def lookupRsids(self, rsids, chunkSize, mode, stream):
+        # One $in query per chunk; mode only applies to the SQL backends.
+        # A streamed cursor returns documents a server batch at a time.
+        for chunk in batches(rsids, chunkSize):
+            cursor = self.collection.find({"rsid": {"$in": chunk}}).batch_size(chunkSize)
+            if not stream:
+                cursor = list(cursor)
+            for doc in cursor:
+                yield doc["rsid"], doc
+
+    def resultChromosomes(self, queryType, params, rows):
+        if queryType == 'qryByRsid' and rows:
+            return set([doc["chr"] for doc in rows])
+        return None
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,255 @@
+import os, time
+from backends.base import Backend
+from snpreader import SnpReader, LociReader, chromosomeFilePaths, batches
+from bulkload import batchInsertSql, writeLoadFile, snpLoadRows, lociLoadRows
+from manifest import createManifest, clearManifest, manifestStates, markChromosome, LOADING, DONE
+from delta import applyRelationalDelta, inSql
+from lookup import RSID_IN_SQL, RSID_JOIN_SQL
+from parallel import reserveIdRanges
+
+TABLES = {}
+TABLES['snp'] = (
+    "CREATE TABLE IF NOT EXISTS `snp`("
+    "  `id` int(11) NOT NULL AUTO_INCREMENT,"
+    "  `rsid` varchar(45) NOT NULL,"
+    "  `chr` varchar(5) NOT NULL,"
+    "  `has_sig` binary(1) NOT NULL,"
+    "  PRIMARY KEY (`id`)"
+    ") ENGINE=InnoDB AUTO_INCREMENT=862719 DEFAULT CHARSET=utf8;")
+TABLES['locus'] = (
+    "CREATE TABLE IF NOT EXISTS `locus`("
+    "  `id` int(11) NOT NULL AUTO_INCREMENT,"
+    "  `mrna_acc` varchar(45) NOT NULL,"
+    "  `gene` varchar(45) NOT NULL,"
+    "  `class` varchar(45) NOT NULL,"
+    "  `snp_id` int(11) NOT NULL,"
+    "  PRIMARY KEY (`id`),"
+    "  CONSTRAINT `idx_snp` FOREIGN KEY (`snp_id`) REFERENCES `snp` (`id`) ON DELETE NO ACTION ON UPDATE NO ACTION"
+    ") ENGINE=InnoDB AUTO_INCREMENT=7564 DEFAULT CHARSET=utf8;")
+
+QUERIES = {
+    'qryByRsid': "SELECT * FROM locus l, snp s WHERE l.snp_id = s.id AND s.rsid = %(rsid)s",
+    'qryByClinSig': "SELECT count(s.id) FROM locus l, snp s WHERE l.snp_id = s.id AND s.has_sig = true",
+    'qryByGene': "SELECT count(distinct s.rsid) FROM locus l, snp s WHERE l.snp_id = s.id AND l.gene = %(gene)s",
+    'qryByGeneSig': "SELECT count(distinct s.rsid) FROM locus l, snp s WHERE l.snp_id = s.id AND l.gene = %(gene)s AND s.has_sig = true",
+}
+
+# qryByGene counted from locus alone, without the join (--locusgene)
+LOCUS_GENE_SQL = "SELECT count(distinct l.snp_id) FROM locus l WHERE l.gene = %(gene)s"
+
+def loadDataFile(cursor, table, columns, filePath):
+    try:
+        cursor.execute("LOAD DATA LOCAL INFILE %s INTO TABLE " + table + " FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' (" + ", ".join(columns) + ")", [filePath])
+    finally:
+        os.remove(filePath)
+
+def sigUpdateSql(rowCount):
+    # Upsert on the primary key, every row of which exists
+    return batchInsertSql("snp", ["id", "rsid", "chr", "has_sig"], rowCount) + " ON DUPLICATE KEY UPDATE has_sig = VALUES(has_sig)"
+
+class MySQLBackend(Backend):
+    # Relational schema loaded with multi-row INSERT statements, or with
+    # LOAD DATA LOCAL INFILE
+    label = "MySQL"
+    serverProcess = "mysqld"
+
+    def __init__(self, args):
+        Backend.__init__(self, args)
+        self.host = args.yhost or '127.0.0.1'
+        self.username = args.username or 'dev'
+        self.password = args.password or ''
+        self.batchSize = args.batch or 1000
+        self.loadFile = args.loadfile
+        self.queries = QUERIES
+        if args.locusgene:
+            self.queries = dict(QUERIES, qryByGene=LOCUS_GENE_SQL)
+
+    def connect(self):
+        import MySQLdb  # http://sourceforge.net/projects/mysql-python/
+        connection = MySQLdb.connect(host=self.host,user=self.username,passwd=self.password)
+        cursor = connection.cursor()
+        cursor.execute("CREATE DATABASE IF NOT EXISTS " + self.databaseName + " DEFAULT CHARACTER SET 'utf8'")
+        connection.commit()
+        connection.close() # Reconnect with database name
+        # Bulk load session settings; each parallel job connects on its own
+        self.connection = MySQLdb.connect(host=self.host,user=self.username,passwd=self.password,db=self.databaseName,local_infile=int(bool(self.loadFile)))
+        cursor = self.connection.cursor()
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0;")
+        cursor.execute("SET UNIQUE_CHECKS = 0;")
+        cursor.execute("SET SESSION tx_isolation='READ-UNCOMMITTED'")
+        cursor.execute("SET sql_log_bin = 0;")
+        cursor.close()
+
+    def createSchema(self):
+        cursor = self.connection.cursor()
+        for name, ddl in TABLES.iteritems():
+            cursor.execute(ddl)
+            self.connection.commit()
+        createManifest(cursor)
+        if not self.resume:
+            clearManifest(cursor)
+            self.forgetFingerprints()
+        self.connection.commit()
+        cursor.close()
+
+    def manifestStates(self):
+        cursor = self.connection.cursor()
+        states = manifestStates(cursor)
+        cursor.close()
+        return states
+
+    def markLoading(self, curChr):
+        cursor = self.connection.cursor()
+        markChromosome(cursor, str(curChr), LOADING)
+        self.connection.commit()
+        cursor.close()
+
+    def removeChromosome(self, curChr):
+        cursor = self.connection.cursor()
+        cursor.execute("DELETE l FROM locus l JOIN snp s ON l.snp_id = s.id WHERE s.chr = %s", [curChr])
+        cursor.execute("DELETE FROM snp WHERE chr = %s", [curChr])
+        self.connection.commit()
+        cursor.close()
+
+    def loadChromosome(self, curChr, path):
+        method = "-Batch" + str(self.batchSize)
+        if self.loadFile:
+            method = "-LoadFile"
+        result = self.newResult(method, str(curChr))
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+
+        # Dictionary of RSIDs that will also hold the primary key for each SNP in SQL
+        rsidList = {}
+        self.forgetFingerprints(curChr)
+        cursor = self.connection.cursor()
+        markChromosome(cursor, str(curChr), LOADING)
+        self.connection.commit()
+
+        # Primary keys are assigned here rather than by auto-increment, whose
+        # ids need not be consecutive (innodb_autoinc_lock_mode=2,
+        # auto_increment_increment > 1): from a parallel load's reserved
+        # range, otherwise past the current maximum id
+        if self.idRanges is not None:
+            nextId = self.idRanges[curChr]
+        else:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM snp")
+            nextId = cursor.fetchone()[0] + 1
+
+        self.markPhase("snpInsert")
+        result.snpInsertStart = time.time()
+        snps = SnpReader(curSnpFilePath)
+        if self.loadFile:
+            snpFile, rowCount = writeLoadFile(snpLoadRows(snps, rsidList, nextId), 'snpchr' + str(curChr) + '-')
+            loadDataFile(cursor, "snp", ["id", "rsid", "chr", "has_sig"], snpFile)
+        else:
+            for snpBatch in batches(snps, self.batchSize):
+                values = []
+                rowCount = 0
+                for snp in snpBatch:
+                    if snp.rsid not in rsidList:
+                        rsidList[snp.rsid] = nextId
+                        values.extend([nextId, snp.rsid, snp.chr, snp.hasSig])
+                        nextId += 1
+                        rowCount += 1
+                if rowCount > 0:
+                    cursor.execute(batchInsertSql("snp", ["id", "rsid", "chr", "has_sig"], rowCount), values)
+        self.connection.commit()
+        result.snpInsertEnd = time.time()
+        result.snpLoadTime = snps.parseTime
+        result.totalSnps = len(rsidList)
+
+        self.markPhase("lociInsert")
+        result.lociInsertStart = time.time()
+        totalLoci = 0
+        loci = LociReader(curLociFilePath)
+        if self.loadFile:
+            lociFile, totalLoci = writeLoadFile(lociLoadRows(loci, rsidList), 'locichr' + str(curChr) + '-')
+            loadDataFile(cursor, "locus", ["mrna_acc", "gene", "class", "snp_id"], lociFile)
+        else:
+            for lociBatch in batches(loci, self.batchSize):
+                values = []
+                rowCount = 0
+                for locus in lociBatch:
+                    if rsidList.get(locus.rsid, 0) > 0: # If RSID value is present, load with PK
+                        values.extend([locus.mrnaAcc, locus.gene, locus.locusClass, rsidList[locus.rsid]])
+                        rowCount += 1
+                if rowCount > 0:
+                    cursor.execute(batchInsertSql("locus", ["mrna_acc", "gene", "class", "snp_id"], rowCount), values)
+                    totalLoci += rowCount
+        markChromosome(cursor, str(curChr), DONE, len(rsidList), totalLoci)
+        self.connection.commit()
+        result.lociInsertEnd = time.time()
+        result.lociLoadTime = loci.parseTime
+        result.totalLoci = totalLoci
+
+        cursor.close()
+        return result
+
+    def reserveIds(self, chromosomes, path):
+        cursor = self.connection.cursor()
+        self.idRanges = reserveIdRanges(cursor, chromosomes, path)
+        cursor.close()
+
+    def applyDelta(self, curChr, changes, result):
+        # All changes in one transaction, with the DONE mark
+        cursor = self.connection.cursor()
+        applyRelationalDelta(cursor, str(curChr), changes, result, self.batchSize, sigUpdateSql)
+        markChromosome(cursor, str(curChr), DONE, len(changes.fingerprints))
+        self.connection.commit()
+        cursor.close()
+
+    def indexStatements(self):
+        cursor = self.connection.cursor()
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1;")
+        cursor.execute("SET UNIQUE_CHECKS = 1;")
+        return [lambda: cursor.execute("CREATE UNIQUE INDEX `idx_rsid` ON `snp` (`rsid`)"),
+                lambda: cursor.execute("CREATE INDEX `idx_clin` ON `snp` (`has_sig`)"),
+                lambda: cursor.execute("CREATE INDEX `idx_gene` ON `locus` (`gene`)")]
+
+    def indexSizes(self):
+        # InnoDB index statistics, in pages, refreshed by ANALYZE TABLE
+        cursor = self.connection.cursor()
+        cursor.execute("ANALYZE TABLE snp, locus")
+        cursor.fetchall()
+        cursor.execute("SELECT index_name, stat_value * @@innodb_page_size FROM mysql.innodb_index_stats "
+                       "WHERE database_name = %s AND stat_name = 'size'", [self.databaseName])
+        sizes = dict([(name, int(size)) for name, size in cursor.fetchall()])
+        cursor.close()
+        return [sizes.get(name) for name in ['idx_rsid', 'idx_clin', 'idx_gene']]
+
+    def runQuery(self, queryType, params):
+        cursor = self.connection.cursor()
+        cursor.execute(self.queries[queryType], params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+    def lookupRsids(self, rsids, chunkSize, mode, stream):
+        import MySQLdb.cursors
+        cursor = self.connection.cursor()
+        if mode == 'temp':
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS lookup_rsid")
+            cursor.execute("CREATE TEMPORARY TABLE lookup_rsid (rsid varchar(45) NOT NULL PRIMARY KEY)")
+            for chunk in batches(rsids, chunkSize):
+                cursor.execute(batchInsertSql("lookup_rsid", ["rsid"], len(chunk)), chunk)
+            queries = [(RSID_JOIN_SQL, None)]
+        else:
+            queries = [(RSID_IN_SQL + inSql(len(chunk)), chunk) for chunk in batches(rsids, chunkSize)]
+        if stream:
+            # An unbuffered cursor hands rows over as the server sends them
+            cursor.close()
+            cursor = self.connection.cursor(MySQLdb.cursors.SSCursor)
+        for sql, params in queries:
+            cursor.execute(sql, params)
+            for row in cursor:
+                yield row[-3], row
+        cursor.close()
+
+    def resultChromosomes(self, queryType, params, rows):
+        # The joined rows end with the snp columns (id, rsid, chr, has_sig)
+        if queryType == 'qryByRsid' and rows:
+            return set([row[-2] for row in rows])
+        return None
+
+    def close(self):
+        self.connection.close()
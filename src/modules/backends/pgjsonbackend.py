@@ -0,0 +1,163 @@
+import json, time
+from backends.pgsqlbackend import PostgresBackend
+from backends.base import INDEX_FIELDS, INDEX_SIZE_FIELDS
+from snpreader import batches
+from bulkload import CopyStream, COPY_CHUNK_SIZE
+from manifest import markChromosome, LOADING, DONE
+from delta import inSql, valuesSql
+
+QUERIES = {
+    'qryByRsid': "SELECT * FROM snp WHERE jsondata @> %(rsidDoc)s",
+    'qryByClinSig': "SELECT count(*) FROM snp WHERE jsondata @> '{\"has_sig\":true}'",
+    'qryByGene': "SELECT count(*) FROM snp WHERE jsondata->'loci' @> %(geneDoc)s",
+    'qryByGeneSig': "SELECT count(*) FROM snp WHERE jsondata->'loci' @> %(geneDoc)s AND jsondata @> '{\"has_sig\":true}'",
+}
+
+# The json type has no operators of its own, so rsid and has_sig are
+# compared as extracted text and the loci by containment on a jsonb cast,
+# each matching the expression of its index
+JSON_QUERIES = {
+    'qryByRsid': "SELECT * FROM snp WHERE jsondata->>'rsid' = %(rsid)s",
+    'qryByClinSig': "SELECT count(*) FROM snp WHERE jsondata->>'has_sig' = 'true'",
+    'qryByGene': "SELECT count(*) FROM snp WHERE (jsondata->'loci')::jsonb @> %(geneDoc)s",
+    'qryByGeneSig': "SELECT count(*) FROM snp WHERE (jsondata->'loci')::jsonb @> %(geneDoc)s AND jsondata->>'has_sig' = 'true'",
+}
+
+def documentParams(params):
+    # The query parameters plus containment documents for the @> operator
+    docParams = dict(params)
+    if "rsid" in params:
+        docParams["rsidDoc"] = json.dumps({"rsid": params["rsid"]})
+    if "gene" in params:
+        docParams["geneDoc"] = json.dumps([{"gene": params["gene"]}])
+    return docParams
+
+def rowDocument(row):
+    # Rows are (id, document); psycopg2 only decodes json columns itself
+    # from v2.5 (jsonb from v2.5.4)
+    if isinstance(row[1], dict):
+        return row[1]
+    return json.loads(row[1])
+
+class PostgresJsonBackend(PostgresBackend):
+    # One SNP/loci document per row in a json column, loaded with COPY or
+    # with one INSERT per document
+    label = "pgsql-json"
+    columnType = "json"
+    queries = JSON_QUERIES
+    locusGeneSql = None
+    lookupJoinSql = "SELECT snp.* FROM snp, lookup_rsid r WHERE snp.jsondata->>'rsid' = r.rsid"
+
+    def __init__(self, args):
+        PostgresBackend.__init__(self, args)
+        self.tables = {'snp': "CREATE TABLE IF NOT EXISTS snp (  id serial PRIMARY KEY,  jsondata " + self.columnType + ");"}
+
+    def loadChromosome(self, curChr, path):
+        method = "-Copy"
+        if self.loadMode == 'insert':
+            method = "-Insert"
+        if self.streamLoad:
+            method += "-Stream"
+        result = self.newResult(method, str(curChr))
+        documents, snps, loci = self.loadDocuments(curChr, path, result)
+
+        self.forgetFingerprints(curChr)
+        cursor = self.connection.cursor()
+        markChromosome(cursor, str(curChr), LOADING)
+        self.connection.commit()
+        self.markPhase("documentInsert")
+        result.documentInsertStart = time.time()
+        if self.loadMode == 'insert':
+            for curDoc in documents:
+                cursor.execute("INSERT INTO snp (jsondata) VALUES (%s)", [json.dumps(curDoc)])
+        else:
+            # Documents are serialized as the driver reads each chunk, so the
+            # insert time covers serialization and the COPY itself
+            docStream = CopyStream((json.dumps(curDoc),) for curDoc in documents)
+            cursor.copy_expert("COPY snp (jsondata) FROM STDIN", docStream, COPY_CHUNK_SIZE)
+        self.streamedCounts(snps, loci, result)
+        markChromosome(cursor, str(curChr), DONE, documents=result.totalDocuments)
+        self.connection.commit()
+        result.documentInsertEnd = time.time()
+
+        cursor.close()
+        return result
+
+    def reserveIds(self, chromosomes, path):
+        # Documents take their ids from the serial sequence, which is safe
+        # across connections
+        return
+
+    def removeChromosome(self, curChr):
+        cursor = self.connection.cursor()
+        cursor.execute("DELETE FROM snp WHERE jsondata->>'chr' = %s", [curChr])
+        self.connection.commit()
+        cursor.close()
+
+    def applyDelta(self, curChr, changes, result):
+        # All changes in one transaction, with the DONE mark. Updates
+        # replace whole documents.
+        cursor = self.connection.cursor()
+        deleteStart = time.time()
+        for batch in batches(changes.deletes, self.batchSize):
+            cursor.execute("DELETE FROM snp WHERE jsondata->>'rsid' IN " + inSql(len(batch)), batch)
+        result.deltaDeleteTime = time.time() - deleteStart
+
+        updateStart = time.time()
+        for batch in batches(changes.updates, self.batchSize):
+            values = []
+            for doc in batch:
+                values.extend([doc["rsid"], json.dumps(doc)])
+            cursor.execute("UPDATE snp SET jsondata = v.jsondata::" + self.columnType + " FROM (VALUES " + valuesSql(2, len(batch)) + ") AS v (rsid, jsondata) WHERE snp.jsondata->>'rsid' = v.rsid", values)
+        result.deltaUpdateTime = time.time() - updateStart
+
+        insertStart = time.time()
+        docStream = CopyStream((json.dumps(curDoc),) for curDoc in changes.inserts)
+        cursor.copy_expert("COPY snp (jsondata) FROM STDIN", docStream, COPY_CHUNK_SIZE)
+        result.deltaInsertTime = time.time() - insertStart
+        markChromosome(cursor, str(curChr), DONE, documents=len(changes.fingerprints))
+        self.connection.commit()
+        cursor.close()
+
+    def indexSql(self):
+        # The json type has no operator classes, so rsid and has_sig are indexed
+        # as extracted text and the loci GIN index is on a jsonb cast
+        return ["CREATE INDEX idx_rsid ON snp ((jsondata ->> 'rsid'))",
+                "CREATE INDEX idx_clin ON snp ((jsondata ->> 'has_sig'))",
+                "CREATE INDEX idx_gene ON snp USING GIN (((jsondata -> 'loci')::jsonb) jsonb_path_ops)"]
+
+    def runQuery(self, queryType, params):
+        return PostgresBackend.runQuery(self, queryType, documentParams(params))
+
+    def lookupChunkQuery(self, chunk):
+        # Matches the extracted text rsid index
+        return "SELECT * FROM snp WHERE jsondata->>'rsid' IN " + inSql(len(chunk)), chunk
+
+    def rowRsid(self, row):
+        return rowDocument(row)["rsid"]
+
+    def resultChromosomes(self, queryType, params, rows):
+        if queryType == 'qryByRsid' and rows:
+            return set([rowDocument(row)["chr"] for row in rows])
+        return None
+
+class PostgresJsonbBackend(PostgresJsonBackend):
+    # The rsid and has_sig containment queries are answered from the full
+    # document GIN index
+    label = "pgsql-jsonb"
+    columnType = "jsonb"
+    queries = QUERIES
+    indexFields = INDEX_FIELDS + ['idxFull']
+    indexSizeFields = INDEX_SIZE_FIELDS + ['idxFullBytes']
+    indexNames = PostgresJsonBackend.indexNames + ['idx_full']
+
+    def lookupChunkQuery(self, chunk):
+        # ?| matches the rsid string against the array and can use the GIN
+        # rsid index
+        return "SELECT * FROM snp WHERE jsondata -> 'rsid' ?| %s", [list(chunk)]
+
+    def indexSql(self):
+        return ["CREATE INDEX idx_rsid ON snp USING GIN ((jsondata -> 'rsid'))",
+                "CREATE INDEX idx_clin ON snp USING GIN ((jsondata -> 'has_sig'))",
+                "CREATE INDEX idx_gene ON snp USING GIN ((jsondata -> 'loci') jsonb_path_ops)",
+                "CREATE INDEX idx_full ON snp USING GIN ((jsondata) jsonb_path_ops)"]
@@ -0,0 +1,321 @@
+import time
+from backends.base import Backend
+from snpreader import SnpReader, LociReader, chromosomeFilePaths, batches
+from bulkload import CopyStream, COPY_CHUNK_SIZE, snpLoadRows, lociLoadRows
+from manifest import createManifest, clearManifest, manifestStates, markChromosome, LOADING, DONE
+from delta import applyRelationalDelta, valuesSql, inSql
+from lookup import RSID_IN_SQL, RSID_JOIN_SQL
+from parallel import reserveIdRanges
+
+TABLES = {}
+TABLES['snp'] = (
+    "CREATE TABLE IF NOT EXISTS snp ("
+    "  id serial PRIMARY KEY,"
+    "  rsid varchar,"
+    "  chr varchar,"
+    "  has_sig boolean"
+    ");")
+TABLES['locus'] = (
+    "CREATE TABLE IF NOT EXISTS locus("
+    "  id serial PRIMARY KEY,"
+    "  mrna_acc varchar,"
+    "  gene varchar,"
+    "  class varchar,"
+    "  snp_id integer,"
+    "  CONSTRAINT idx_snp FOREIGN KEY (snp_id) REFERENCES snp (id) ON DELETE NO ACTION ON UPDATE NO ACTION"
+    ");")
+
+QUERIES = {
+    'qryByRsid': "SELECT * FROM locus l, snp s WHERE l.snp_id = s.id AND s.rsid = %(rsid)s",
+    'qryByClinSig': "SELECT count(s.id) FROM locus l, snp s WHERE l.snp_id = s.id AND s.has_sig = true",
+    'qryByGene': "SELECT count(distinct s.rsid) FROM locus l, snp s WHERE l.snp_id = s.id AND l.gene = %(gene)s",
+    'qryByGeneSig': "SELECT count(distinct s.rsid) FROM locus l, snp s WHERE l.snp_id = s.id AND l.gene = %(gene)s AND s.has_sig = true",
+}
+
+# qryByGene counted from locus alone, without the join (--locusgene)
+LOCUS_GENE_SQL = "SELECT count(distinct l.snp_id) FROM locus l WHERE l.gene = %(gene)s"
+
+def sigUpdateSql(rowCount):
+    # UPDATE ... FROM VALUES works on servers without ON CONFLICT (9.5+)
+    return "UPDATE snp SET has_sig = v.has_sig FROM (VALUES " + valuesSql(4, rowCount) + ") AS v (id, rsid, chr, has_sig) WHERE snp.id = v.id"
+
+class PostgresBackend(Backend):
+    # Base for the PostgreSQL backends: recreates the experimental database
+    # (or keeps it when resuming) and runs SQL queries. Subclasses provide
+    # TABLES/QUERIES, the load, removeChromosome and applyDelta.
+    label = "pgsql"
+    serverProcess = "postgres"
+    tables = TABLES
+    queries = QUERIES
+    # Replaces qryByGene with --locusgene; None without a locus table
+    locusGeneSql = LOCUS_GENE_SQL
+    lookupJoinSql = RSID_JOIN_SQL
+    # Index names, in indexFields order
+    indexNames = ['idx_rsid', 'idx_clin', 'idx_gene']
+
+    def __init__(self, args):
+        Backend.__init__(self, args)
+        self.username = args.username or 'dev'
+        # Rows per statement when applying a delta
+        self.batchSize = args.batch or 1000
+        # Load with COPY FROM STDIN, or with one INSERT per row ('insert')
+        self.loadMode = args.pgload or 'copy'
+        if args.locusgene and self.locusGeneSql is not None:
+            self.queries = dict(self.queries, qryByGene=self.locusGeneSql)
+
+    def connect(self):
+        import psycopg2  # psycopg2 v2.5.1
+        self.driver = psycopg2
+        try:
+            self.connection = self.connectDatabase(self.databaseName)
+        except psycopg2.OperationalError:
+            # The experimental database does not exist yet; createSchema makes it
+            self.connection = None
+
+    def connectDatabase(self, databaseName):
+        return self.driver.connect("dbname=" + databaseName + " user=" + self.username)
+
+    def createSchema(self):
+        # Recreate the experimental database from the user database, then
+        # reconnect with database name. A resumed load keeps the database
+        # if it exists.
+        if self.connection is None or not self.resume:
+            if self.connection is not None:
+                self.connection.close()
+            connection = self.connectDatabase(self.username)
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute("DROP DATABASE IF EXISTS " + self.databaseName)
+            cursor.execute("CREATE DATABASE " + self.databaseName)
+            cursor.close()
+            connection.close()
+            self.connection = self.connectDatabase(self.databaseName)
+
+        cursor = self.connection.cursor()
+        for name, ddl in self.tables.iteritems():
+            cursor.execute(ddl)
+        createManifest(cursor)
+        if not self.resume:
+            clearManifest(cursor)
+            self.forgetFingerprints()
+        # Disable triggers/constraints on tables
+        for name in self.tables:
+            cursor.execute("ALTER TABLE " + name + " DISABLE trigger ALL;")
+        self.connection.commit()
+        cursor.close()
+
+    def manifestStates(self):
+        cursor = self.connection.cursor()
+        states = manifestStates(cursor)
+        self.connection.commit()
+        cursor.close()
+        return states
+
+    def markLoading(self, curChr):
+        cursor = self.connection.cursor()
+        markChromosome(cursor, str(curChr), LOADING)
+        self.connection.commit()
+        cursor.close()
+
+    def removeChromosome(self, curChr):
+        cursor = self.connection.cursor()
+        cursor.execute("DELETE FROM locus USING snp WHERE locus.snp_id = snp.id AND snp.chr = %s", [curChr])
+        cursor.execute("DELETE FROM snp WHERE chr = %s", [curChr])
+        self.connection.commit()
+        cursor.close()
+
+    def enableTriggers(self, cursor):
+        for name in self.tables:
+            cursor.execute("ALTER TABLE " + name + " ENABLE trigger ALL;")
+
+    def loadChromosome(self, curChr, path):
+        if self.loadMode == 'insert':
+            return self.insertChromosome(curChr, path)
+        result = self.newResult("-Copy", str(curChr))
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+
+        # Dictionary of RSIDs that will also hold the primary key for each SNP in SQL
+        rsidList = {}
+        self.forgetFingerprints(curChr)
+        cursor = self.connection.cursor()
+        markChromosome(cursor, str(curChr), LOADING)
+        self.connection.commit()
+
+        # Assign primary keys past the current maximum id, then move the
+        # serial sequence past the loaded ids. Parallel loads use the reserved
+        # range and the sequence is moved once all chromosomes are loaded.
+        self.markPhase("snpInsert")
+        result.snpInsertStart = time.time()
+        snps = SnpReader(curSnpFilePath)
+        if self.idRanges is not None:
+            nextId = self.idRanges[curChr]
+        else:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM snp")
+            nextId = cursor.fetchone()[0] + 1
+        cursor.copy_expert("COPY snp (id, rsid, chr, has_sig) FROM STDIN", CopyStream(snpLoadRows(snps, rsidList, nextId)), COPY_CHUNK_SIZE)
+        if self.idRanges is None:
+            cursor.execute("SELECT setval('snp_id_seq', (SELECT MAX(id) FROM snp))")
+        self.connection.commit()
+        result.snpInsertEnd = time.time()
+        result.snpLoadTime = snps.parseTime
+        result.totalSnps = len(rsidList)
+
+        self.markPhase("lociInsert")
+        result.lociInsertStart = time.time()
+        loci = LociReader(curLociFilePath)
+        lociStream = CopyStream(lociLoadRows(loci, rsidList))
+        cursor.copy_expert("COPY locus (mrna_acc, gene, class, snp_id) FROM STDIN", lociStream, COPY_CHUNK_SIZE)
+        markChromosome(cursor, str(curChr), DONE, len(rsidList), lociStream.rowCount)
+        self.connection.commit()
+        result.lociInsertEnd = time.time()
+        result.lociLoadTime = loci.parseTime
+        result.totalLoci = lociStream.rowCount
+
+        cursor.close()
+        return result
+
+    def insertChromosome(self, curChr, path):
+        # One INSERT per row; SNP keys come from the serial sequence
+        result = self.newResult("-Insert", str(curChr))
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+
+        rsidList = {}
+        self.forgetFingerprints(curChr)
+        cursor = self.connection.cursor()
+        markChromosome(cursor, str(curChr), LOADING)
+        self.connection.commit()
+
+        self.markPhase("snpInsert")
+        result.snpInsertStart = time.time()
+        snps = SnpReader(curSnpFilePath)
+        for snp in snps:
+            if snp.rsid in rsidList:
+                continue
+            cursor.execute("INSERT INTO snp (rsid, chr, has_sig) VALUES (%s, %s, %s) RETURNING id", [snp.rsid, snp.chr, snp.hasSig])
+            rsidList[snp.rsid] = cursor.fetchone()[0]
+        self.connection.commit()
+        result.snpInsertEnd = time.time()
+        result.snpLoadTime = snps.parseTime
+        result.totalSnps = len(rsidList)
+
+        self.markPhase("lociInsert")
+        result.lociInsertStart = time.time()
+        totalLoci = 0
+        loci = LociReader(curLociFilePath)
+        for locus in loci:
+            if rsidList.get(locus.rsid, 0) > 0: # If RSID value is present, load with PK
+                cursor.execute("INSERT INTO locus (mrna_acc, gene, class, snp_id) VALUES (%s, %s, %s, %s)", [locus.mrnaAcc, locus.gene, locus.locusClass, rsidList[locus.rsid]])
+                totalLoci += 1
+        markChromosome(cursor, str(curChr), DONE, len(rsidList), totalLoci)
+        self.connection.commit()
+        result.lociInsertEnd = time.time()
+        result.lociLoadTime = loci.parseTime
+        result.totalLoci = totalLoci
+
+        cursor.close()
+        return result
+
+    def reserveIds(self, chromosomes, path):
+        # Inserted rows take their ids from the serial sequence, which is
+        # safe across connections
+        if self.loadMode == 'insert':
+            return
+        cursor = self.connection.cursor()
+        self.idRanges = reserveIdRanges(cursor, chromosomes, path)
+        self.connection.commit()
+        cursor.close()
+
+    def finishLoad(self):
+        # Move the serial sequence past the ids loaded by the jobs
+        if self.idRanges is not None:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT setval('snp_id_seq', (SELECT MAX(id) FROM snp))")
+            self.connection.commit()
+            cursor.close()
+        Backend.finishLoad(self)
+
+    def applyDelta(self, curChr, changes, result):
+        # All changes in one transaction, with the DONE mark
+        cursor = self.connection.cursor()
+        applyRelationalDelta(cursor, str(curChr), changes, result, self.batchSize, sigUpdateSql)
+        cursor.execute("SELECT setval('snp_id_seq', (SELECT MAX(id) FROM snp))")
+        markChromosome(cursor, str(curChr), DONE, len(changes.fingerprints))
+        self.connection.commit()
+        cursor.close()
+
+    def indexSql(self):
+        return ["CREATE UNIQUE INDEX idx_rsid ON snp (rsid)",
+                "CREATE INDEX idx_clin ON snp (has_sig)",
+                "CREATE INDEX idx_gene ON locus (gene)"]
+
+    def indexStatements(self):
+        # Turn on triggers, create FK index since PGSQL does not
+        # automatically index FKs
+        cursor = self.connection.cursor()
+        self.enableTriggers(cursor)
+        if 'locus' in self.tables:
+            cursor.execute("CREATE INDEX idx_snpid_fk ON locus (snp_id)")
+        self.connection.commit()
+        return [self.indexRunner(cursor, sql) for sql in self.indexSql()]
+
+    def indexRunner(self, cursor, sql):
+        def createIndex():
+            cursor.execute(sql)
+            self.connection.commit()
+        return createIndex
+
+    def indexSizes(self):
+        cursor = self.connection.cursor()
+        sizes = []
+        for name in self.indexNames:
+            cursor.execute("SELECT pg_relation_size(%s::regclass)", [name])
+            sizes.append(cursor.fetchone()[0])
+        self.connection.commit()
+        cursor.close()
+        return sizes
+
+    def runQuery(self, queryType, params):
+        cursor = self.connection.cursor()
+        cursor.execute(self.queries[queryType], params)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+    def lookupChunkQuery(self, chunk):
+        return RSID_IN_SQL + inSql(len(chunk)), chunk
+
+    def rowRsid(self, row):
+        return row[-3]
+
+    def lookupRsids(self, rsids, chunkSize, mode, stream):
+        cursor = self.connection.cursor()
+        if mode == 'temp':
+            cursor.execute("CREATE TEMPORARY TABLE IF NOT EXISTS lookup_rsid (rsid varchar PRIMARY KEY)")
+            cursor.execute("TRUNCATE lookup_rsid")
+            cursor.copy_expert("COPY lookup_rsid (rsid) FROM STDIN", CopyStream((rsid,) for rsid in rsids), COPY_CHUNK_SIZE)
+            cursor.execute("ANALYZE lookup_rsid")
+            queries = [(self.lookupJoinSql, None)]
+        else:
+            queries = [self.lookupChunkQuery(chunk) for chunk in batches(rsids, chunkSize)]
+        for sql, params in queries:
+            queryCursor = cursor
+            if stream:
+                # A named (server-side) cursor fetches itersize rows at a time
+                queryCursor = self.connection.cursor(name="rsid_lookup")
+                queryCursor.itersize = chunkSize
+            queryCursor.execute(sql, params)
+            for row in queryCursor:
+                yield self.rowRsid(row), row
+            if stream:
+                queryCursor.close()
+        self.connection.commit()
+        cursor.close()
+
+    def resultChromosomes(self, queryType, params, rows):
+        # The joined rows end with the snp columns (id, rsid, chr, has_sig)
+        if queryType == 'qryByRsid' and rows:
+            return set([row[-2] for row in rows])
+        return None
+
+    def close(self):
+        self.connection.close()
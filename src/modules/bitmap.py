@@ -0,0 +1,225 @@
+import binascii
+from array import array
+from bisect import bisect_left
+from snpreader import SnpReader, LociReader
+
+# Roaring-style compressed bitmaps over 32-bit SNP ordinals. The high 16
+# bits of an ordinal select a container holding the low 16 bits: a sorted
+# array of shorts while it has at most ARRAY_MAX values, otherwise a 65536
+# bit bitmap.
+ARRAY_MAX = 4096
+BITMAP_BYTES = 8192
+
+# Query types the bitmaps answer
+BITMAP_QUERY_TYPES = ['qryByClinSig', 'qryByGene', 'qryByGeneSig', 'qryByGeneClassSig']
+
+def popCount(value):
+    return bin(value).count('1')
+
+class ArrayContainer:
+    def __init__(self, values=()):
+        self.values = array('H', values)
+
+    def add(self, low):
+        # Ordinals mostly arrive in ascending order, so try the end first
+        values = self.values
+        if not values or values[-1] < low:
+            values.append(low)
+            return True
+        position = bisect_left(values, low)
+        if position < len(values) and values[position] == low:
+            return False
+        values.insert(position, low)
+        return True
+
+    def contains(self, low):
+        position = bisect_left(self.values, low)
+        return position < len(self.values) and self.values[position] == low
+
+    def cardinality(self):
+        return len(self.values)
+
+    def intersectionCardinality(self, other):
+        if isinstance(other, ArrayContainer):
+            return len(set(self.values).intersection(other.values))
+        return sum([1 for low in self.values if other.contains(low)])
+
+    def intersection(self, other):
+        if isinstance(other, ArrayContainer):
+            return ArrayContainer(sorted(set(self.values).intersection(other.values)))
+        return ArrayContainer([low for low in self.values if other.contains(low)])
+
+    def sizeBytes(self):
+        return 2 * len(self.values)
+
+class BitmapContainer:
+    # Bits are set in a bytearray; set operations and counts work on the
+    # bitmap as one integer, rebuilt after changes
+    def __init__(self, values=()):
+        self.bits = bytearray(BITMAP_BYTES)
+        self.count = 0
+        self.integer = None
+        for low in values:
+            self.add(low)
+
+    def add(self, low):
+        mask = 1 << (low & 7)
+        if self.bits[low >> 3] & mask:
+            return False
+        self.bits[low >> 3] |= mask
+        self.count += 1
+        self.integer = None
+        return True
+
+    def contains(self, low):
+        return self.bits[low >> 3] & (1 << (low & 7)) != 0
+
+    def cardinality(self):
+        return self.count
+
+    def asInteger(self):
+        # Byte 0 is the least significant, so reverse before reading it as hex
+        if self.integer is None:
+            self.integer = int(binascii.hexlify(bytes(self.bits[::-1])), 16)
+        return self.integer
+
+    def intersectionCardinality(self, other):
+        if isinstance(other, BitmapContainer):
+            return popCount(self.asInteger() & other.asInteger())
+        return other.intersectionCardinality(self)
+
+    def intersection(self, other):
+        # An intersection of at most ARRAY_MAX values is stored as an array
+        if not isinstance(other, BitmapContainer):
+            return other.intersection(self)
+        integer = self.asInteger() & other.asInteger()
+        container = BitmapContainer()
+        container.bits = bytearray(binascii.unhexlify('%0*x' % (2 * BITMAP_BYTES, integer)))[::-1]
+        container.count = popCount(integer)
+        container.integer = integer
+        if container.count > ARRAY_MAX:
+            return container
+        return ArrayContainer([low for low in range(1 << 16) if container.contains(low)])
+
+    def sizeBytes(self):
+        return BITMAP_BYTES
+
+class RoaringBitmap:
+    def __init__(self):
+        self.containers = {}
+
+    def add(self, ordinal):
+        high = ordinal >> 16
+        container = self.containers.get(high)
+        if container is None:
+            container = self.containers[high] = ArrayContainer()
+        if container.add(ordinal & 0xffff) and isinstance(container, ArrayContainer) and container.cardinality() > ARRAY_MAX:
+            self.containers[high] = BitmapContainer(container.values)
+
+    def contains(self, ordinal):
+        container = self.containers.get(ordinal >> 16)
+        return container is not None and container.contains(ordinal & 0xffff)
+
+    def cardinality(self):
+        return sum([container.cardinality() for container in self.containers.values()])
+
+    def intersectionCardinality(self, other):
+        # Only containers present in both bitmaps can intersect
+        if len(other.containers) < len(self.containers):
+            return other.intersectionCardinality(self)
+        total = 0
+        for high, container in self.containers.items():
+            otherContainer = other.containers.get(high)
+            if otherContainer is not None:
+                total += container.intersectionCardinality(otherContainer)
+        return total
+
+    def intersection(self, other):
+        result = RoaringBitmap()
+        for high, container in self.containers.items():
+            otherContainer = other.containers.get(high)
+            if otherContainer is not None:
+                common = container.intersection(otherContainer)
+                if common.cardinality() > 0:
+                    result.containers[high] = common
+        return result
+
+    def sizeBytes(self):
+        # Serialized size: container payloads plus a key and cardinality per
+        # container, as in the roaring format
+        return sum([4 + container.sizeBytes() for container in self.containers.values()])
+
+def intersectionCount(bitmaps):
+    # Cardinality of the intersection of any number of bitmaps, smallest
+    # first: all but the last are intersected pairwise, and the last is
+    # only counted against the result
+    bitmaps = sorted(bitmaps, key=lambda bitmap: bitmap.cardinality())
+    common = bitmaps[0]
+    for bitmap in bitmaps[1:-1]:
+        common = common.intersection(bitmap)
+    if len(bitmaps) == 1:
+        return common.cardinality()
+    return common.intersectionCardinality(bitmaps[-1])
+
+class BitmapIndex:
+    # Bitmaps over SNP ordinals for has_sig, each gene and each loci class,
+    # built from the same data files as the load. SNPs are numbered in load
+    # order across chromosomes.
+    def __init__(self):
+        self.snpCount = 0
+        self.hasSig = RoaringBitmap()
+        self.genes = {}
+        self.classes = {}
+
+    def addChromosome(self, snpFilePath, lociFilePath):
+        # rsid -> ordinal is only kept for the chromosome being added
+        ordinals = {}
+        for snp in SnpReader(snpFilePath):
+            if snp.rsid in ordinals:
+                continue
+            ordinals[snp.rsid] = self.snpCount
+            if snp.hasSig:
+                self.hasSig.add(self.snpCount)
+            self.snpCount += 1
+        for locus in LociReader(lociFilePath):
+            ordinal = ordinals.get(locus.rsid)
+            if ordinal is None:
+                continue
+            if locus.gene not in self.genes:
+                self.genes[locus.gene] = RoaringBitmap()
+            self.genes[locus.gene].add(ordinal)
+            if locus.locusClass not in self.classes:
+                self.classes[locus.locusClass] = RoaringBitmap()
+            self.classes[locus.locusClass].add(ordinal)
+
+    def count(self, gene=None, locusClass=None, sigOnly=False):
+        # SNPs with a locus on gene and a locus of locusClass (not
+        # necessarily the same one), and has_sig if sigOnly
+        bitmaps = []
+        if gene is not None:
+            bitmaps.append(self.genes.get(gene))
+        if locusClass is not None:
+            bitmaps.append(self.classes.get(locusClass))
+        if sigOnly:
+            bitmaps.append(self.hasSig)
+        if None in bitmaps:
+            return 0
+        if not bitmaps:
+            return self.snpCount
+        return intersectionCount(bitmaps)
+
+    def runQuery(self, queryType, params):
+        # The count queries of the workload; ClinSig counts SNPs
+        if queryType == 'qryByClinSig':
+            return self.count(sigOnly=True)
+        if queryType == 'qryByGene':
+            return self.count(gene=params["gene"])
+        if queryType == 'qryByGeneSig':
+            return self.count(gene=params["gene"], sigOnly=True)
+        if queryType == 'qryByGeneClassSig':
+            return self.count(gene=params["gene"], locusClass=params["locusClass"], sigOnly=True)
+        raise ValueError("Bitmaps do not answer " + queryType)
+
+    def sizeBytes(self):
+        bitmaps = [self.hasSig] + list(self.genes.values()) + list(self.classes.values())
+        return sum([bitmap.sizeBytes() for bitmap in bitmaps])
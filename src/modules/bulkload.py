@@ -0,0 +1,79 @@
+import os, tempfile
+
+# Bytes handed to the driver per read when streaming a COPY
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Text format shared by MySQL LOAD DATA INFILE and PostgreSQL COPY:
+# tab separated columns, one row per line, backslash escapes
+def copyValue(value):
+    if value is None:
+        return '\\N'
+    if value is True:
+        return '1'
+    if value is False:
+        return '0'
+    value = str(value)
+    if '\\' in value or '\t' in value or '\n' in value or '\r' in value:
+        value = value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return value
+
+def copyRow(values):
+    return '\t'.join([copyValue(v) for v in values]) + '\n'
+
+def batchInsertSql(table, columns, rowCount):
+    # Multi-row INSERT statement with placeholders for rowCount rows
+    rowSql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    return "INSERT INTO " + table + " (" + ", ".join(columns) + ") VALUES " + ", ".join([rowSql] * rowCount)
+
+def writeLoadFile(rows, prefix):
+    # Write rows to a temporary load file and return its path and row count;
+    # the caller removes the file once it has been loaded
+    fd, filePath = tempfile.mkstemp(prefix=prefix, suffix='.txt')
+    rowCount = 0
+    with os.fdopen(fd, 'w') as loadFile:
+        for row in rows:
+            loadFile.write(copyRow(row))
+            rowCount += 1
+    return filePath, rowCount
+
+def snpLoadRows(snps, rsidList, nextId):
+    # Assign each new SNP the next primary key and yield its load row
+    for snp in snps:
+        if snp.rsid in rsidList:
+            continue
+        rsidList[snp.rsid] = nextId
+        yield (nextId, snp.rsid, snp.chr, snp.hasSig)
+        nextId += 1
+
+def lociLoadRows(loci, rsidList):
+    # Yield a load row with the SNP foreign key for each matched locus
+    for locus in loci:
+        snpId = rsidList.get(locus.rsid, 0)
+        if snpId > 0:
+            yield (locus.mrnaAcc, locus.gene, locus.locusClass, snpId)
+
+class CopyStream:
+    # Read-only file object over an iterator of rows, formatted on demand
+    # so COPY FROM STDIN can stream without a temp file
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = ''
+        self.rowCount = 0
+
+    def read(self, size=-1):
+        chunks = [self.buffer]
+        length = len(self.buffer)
+        while size < 0 or length < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            line = copyRow(row)
+            chunks.append(line)
+            length += len(line)
+            self.rowCount += 1
+        data = ''.join(chunks)
+        if size < 0 or length <= size:
+            self.buffer = ''
+            return data
+        self.buffer = data[size:]
+        return data[:size]
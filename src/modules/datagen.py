@@ -0,0 +1,183 @@
+import bisect, random
+from snpreader import SnpReader, LociReader, chromosomeFilePaths
+from docstream import rsidKey
+
+# Chromosome lengths in Mb (GRCh38); SNP and gene counts are scaled by
+# length relative to the sample chromosome
+CHROMOSOME_LENGTHS = {"1": 248.96, "2": 242.19, "3": 198.30, "4": 190.21, "5": 181.54, "6": 170.81,
+                      "7": 159.35, "8": 145.14, "9": 138.39, "10": 133.80, "11": 135.09, "12": 133.28,
+                      "13": 114.36, "14": 107.04, "15": 101.99, "16": 90.34, "17": 83.26, "18": 80.37,
+                      "19": 58.62, "20": 64.44, "21": 46.71, "22": 50.82, "X": 156.04, "Y": 57.23, "MT": 0.02}
+
+# Entries in each sampling table; sampling is one table lookup per draw
+TABLE_SIZE = 65536
+
+# SNP records generated and written per block
+BLOCK_SIZE = 10000
+
+class Distribution:
+    # Empirical distribution over values, sampled by table lookup with a
+    # uniform random number in [0, 1)
+    def __init__(self, counts):
+        values = sorted(counts)
+        total = float(sum(counts.values()))
+        cumulative = []
+        running = 0
+        for value in values:
+            running += counts[value]
+            cumulative.append(running / total)
+        self.table = [values[min(bisect.bisect_right(cumulative, (i + 0.5) / TABLE_SIZE), len(values) - 1)] for i in range(TABLE_SIZE)]
+
+    def sample(self, rand):
+        return self.table[int(rand * TABLE_SIZE)]
+
+def countInto(counts, value):
+    counts[value] = counts.get(value, 0) + 1
+
+class DataProfile:
+    # Distributions learned from a sample chromosome: loci per SNP, gene
+    # frequencies, transcripts per gene, class values, has_sig ratio, rsid
+    # spacing and mRNA accession shapes
+    def __init__(self, snpFilePath, lociFilePath):
+        rsids = []
+        sigCount = 0
+        for snp in SnpReader(snpFilePath):
+            rsids.append(rsidKey(snp.rsid))
+            if snp.hasSig:
+                sigCount += 1
+        self.sampleChromosome = snp.chr
+        self.snpCount = len(rsids)
+        self.hasSigRatio = float(sigCount) / self.snpCount
+
+        lociCounts = {}
+        geneCounts = {}
+        classCounts = {}
+        transcripts = {}
+        prefixCounts = {}
+        digitCounts = {}
+        versionCounts = {}
+        snpGenes = {}
+        for locus in LociReader(lociFilePath):
+            countInto(lociCounts, locus.rsid)
+            countInto(geneCounts, locus.gene)
+            countInto(classCounts, locus.locusClass)
+            transcripts.setdefault(locus.gene, set()).add(locus.mrnaAcc)
+            snpGenes.setdefault(locus.rsid, []).append(locus.gene)
+            accession, dot, version = locus.mrnaAcc.partition('.')
+            prefix, underscore, number = accession.partition('_')
+            countInto(prefixCounts, prefix + underscore)
+            countInto(digitCounts, len(number))
+            countInto(versionCounts, version)
+
+        lociPerSnp = {}
+        for count in lociCounts.values():
+            countInto(lociPerSnp, count)
+        lociPerSnp[0] = self.snpCount - len(lociCounts)
+        self.lociPerSnp = Distribution(lociPerSnp)
+
+        # Share of a SNP's loci that are in its most common gene
+        sameGene = 0
+        for genes in snpGenes.values():
+            sameGene += max([genes.count(gene) for gene in set(genes)])
+        self.sameGeneRatio = float(sameGene) / max(sum(lociCounts.values()), 1)
+
+        self.geneNames = sorted(geneCounts, key=lambda gene: -geneCounts[gene])
+        self.geneProfile = [geneCounts[gene] for gene in self.geneNames]
+        transcriptCounts = {}
+        for accessions in transcripts.values():
+            countInto(transcriptCounts, len(accessions))
+        self.transcriptsPerGene = Distribution(transcriptCounts)
+        self.classes = Distribution(classCounts)
+        self.prefixes = Distribution(prefixCounts)
+        self.digits = Distribution(digitCounts)
+        self.versions = Distribution(versionCounts)
+
+        rsids.sort()
+        gapCounts = {}
+        for i in range(1, len(rsids)):
+            countInto(gapCounts, max(rsids[i] - rsids[i - 1], 1))
+        if not gapCounts:
+            gapCounts[1] = 1
+        self.rsidGaps = Distribution(gapCounts)
+        self.maxRsidGap = max(gapCounts)
+
+    def chromosomeSnps(self, curChr, scale, baseSnps=None):
+        # SNPs for a chromosome at scale, relative to the sample chromosome
+        # (or to baseSnps SNPs on the sample chromosome at 1x)
+        base = baseSnps or self.snpCount
+        factor = CHROMOSOME_LENGTHS[curChr] / CHROMOSOME_LENGTHS.get(self.sampleChromosome, CHROMOSOME_LENGTHS["21"])
+        return max(1, int(round(base * scale * factor)))
+
+    def chromosomeGenes(self, curChr, extraGenes=()):
+        # Gene names and weights for a chromosome. The gene count follows
+        # chromosome length, the weights repeat the sample's rank/frequency
+        # profile. The sample chromosome keeps its own gene names; extraGenes
+        # (e.g. the query workload genes) take the top ranks.
+        factor = CHROMOSOME_LENGTHS[curChr] / CHROMOSOME_LENGTHS.get(self.sampleChromosome, CHROMOSOME_LENGTHS["21"])
+        geneCount = max(len(self.geneNames), int(round(len(self.geneNames) * factor)), len(extraGenes))
+        names = list(extraGenes)
+        if curChr == self.sampleChromosome:
+            names += [gene for gene in self.geneNames if gene not in extraGenes]
+        rank = 0
+        while len(names) < geneCount:
+            rank += 1
+            names.append("C" + curChr + "G" + str(rank))
+        weights = [self.geneProfile[i % len(self.geneProfile)] for i in range(geneCount)]
+        return names[:geneCount], weights
+
+def rsidStarts(profile, chromosomeSnpCounts):
+    # First rsid number of each chromosome, in chromosome order, so the
+    # ranges never overlap however the rsid gaps fall
+    starts = {}
+    nextStart = 1
+    for curChr, snpCount in chromosomeSnpCounts:
+        starts[curChr] = nextStart
+        nextStart += snpCount * profile.maxRsidGap + 1
+    return starts
+
+def writeChromosome(profile, curChr, snpCount, firstRsid, outPath, seed, extraGenes=()):
+    # Write snpData/lociData files for one chromosome, ordered by rsid as the
+    # streaming loaders expect. Returns (SNP rows, loci rows).
+    rand = random.Random(seed).random
+    geneNames, geneWeights = profile.chromosomeGenes(curChr, extraGenes)
+    genes = Distribution(dict(zip(range(len(geneNames)), geneWeights)))
+    geneTranscripts = {}
+
+    def transcriptsFor(geneIndex):
+        if geneIndex not in geneTranscripts:
+            accessions = []
+            for i in range(profile.transcriptsPerGene.sample(rand())):
+                digits = profile.digits.sample(rand())
+                number = str(int(rand() * 10 ** digits)).zfill(digits)
+                accessions.append(profile.prefixes.sample(rand()) + number + "." + profile.versions.sample(rand()))
+            geneTranscripts[geneIndex] = accessions
+        return geneTranscripts[geneIndex]
+
+    curSnpFilePath, curLociFilePath = chromosomeFilePaths(outPath, curChr)
+    rsid = firstRsid
+    lociRows = 0
+    with open(curSnpFilePath, 'w') as snpFile:
+        with open(curLociFilePath, 'w') as lociFile:
+            written = 0
+            while written < snpCount:
+                snpLines = []
+                lociLines = []
+                for i in range(min(BLOCK_SIZE, snpCount - written)):
+                    rsid += profile.rsidGaps.sample(rand())
+                    rsidText = "rs" + str(rsid)
+                    snpLines.append(rsidText + "\t" + curChr + "\t" + ("true" if rand() < profile.hasSigRatio else "false") + "\n")
+                    lociCount = profile.lociPerSnp.sample(rand())
+                    if lociCount == 0:
+                        continue
+                    snpGene = genes.sample(rand())
+                    for j in range(lociCount):
+                        geneIndex = snpGene
+                        if rand() >= profile.sameGeneRatio:
+                            geneIndex = genes.sample(rand())
+                        accessions = transcriptsFor(geneIndex)
+                        lociLines.append(rsidText + "\t" + accessions[int(rand() * len(accessions))] + "\t" + geneNames[geneIndex] + "\t" + profile.classes.sample(rand()) + "\n")
+                snpFile.write(''.join(snpLines))
+                lociFile.write(''.join(lociLines))
+                written += len(snpLines)
+                lociRows += len(lociLines)
+    return snpCount, lociRows
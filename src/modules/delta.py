@@ -0,0 +1,165 @@
+import glob, hashlib, os, time
+from snpreader import SnpReader, LociReader, batches
+from docstream import newDocument, newLocus, rsidKey
+from bulkload import batchInsertSql
+
+# Sidecar fingerprint file of a chromosome, per backend label and database:
+# one "rsid <tab> has_sig <tab> loci hash" line per SNP
+FINGERPRINT_DIR = 'fingerprints'
+FINGERPRINT_FILE = '{0}-{1}-chr{2}.txt'
+
+def fingerprintFilePath(fingerprintDir, label, databaseName, curChr):
+    return os.path.join(fingerprintDir, FINGERPRINT_FILE.format(label, databaseName, curChr))
+
+def lociHash(loci):
+    # Hash of a SNP's loci that does not depend on their order in the file
+    lines = sorted(['\t'.join([locus["mrna_acc"], locus["gene"], locus["class"]]) for locus in loci])
+    return hashlib.md5('\n'.join(lines).encode('utf-8')).hexdigest()[:16]
+
+def fingerprint(doc):
+    return ('1' if doc["has_sig"] else '0', lociHash(doc["loci"]))
+
+def readFingerprints(filePath):
+    # {rsid: (has_sig, loci hash)}, or None if the chromosome has none
+    if not os.path.exists(filePath):
+        return None
+    fingerprints = {}
+    with open(filePath, 'r') as fingerprintFile:
+        for line in fingerprintFile:
+            row = line.rstrip('\r\n').split('\t')
+            if len(row) == 3:
+                fingerprints[row[0]] = (row[1], row[2])
+    return fingerprints
+
+def writeFingerprints(filePath, fingerprints):
+    # Written to a temporary file and renamed into place, so a failed write
+    # never leaves a partial fingerprint behind
+    fingerprintDir = os.path.dirname(filePath)
+    if fingerprintDir and not os.path.isdir(fingerprintDir):
+        os.makedirs(fingerprintDir)
+    tmpFilePath = filePath + '.tmp'
+    with open(tmpFilePath, 'w') as fingerprintFile:
+        for rsid in sorted(fingerprints, key=rsidKey):
+            fingerprintFile.write(rsid + '\t' + '\t'.join(fingerprints[rsid]) + '\n')
+    os.rename(tmpFilePath, filePath)
+
+def removeFingerprints(filePath):
+    if os.path.exists(filePath):
+        os.remove(filePath)
+
+def removeAllFingerprints(fingerprintDir, label, databaseName):
+    # The fingerprints of every chromosome of one backend label and database
+    for filePath in glob.glob(fingerprintFilePath(fingerprintDir, label, databaseName, '*')):
+        os.remove(filePath)
+
+def readDocuments(snpFilePath, lociFilePath):
+    # {rsid: SNP/loci document} for one chromosome, as in the document loads
+    documents = {}
+    for snp in SnpReader(snpFilePath):
+        documents[snp.rsid] = newDocument(snp)
+    for locus in LociReader(lociFilePath):
+        if locus.rsid in documents:
+            documents[locus.rsid]["loci"].append(newLocus(locus))
+    return documents
+
+class ChromosomeDelta:
+    # Changes between a chromosome's stored fingerprints and its new data
+    # files. inserts and updates hold SNP/loci documents, deletes holds
+    # rsids. sigUpdates and lociUpdates split updates by what changed, so
+    # the relational backends only rewrite loci where they changed.
+    # fingerprints holds the fingerprints of the new data.
+    def __init__(self):
+        self.inserts = []
+        self.updates = []
+        self.sigUpdates = []
+        self.lociUpdates = []
+        self.deletes = []
+        self.fingerprints = {}
+
+def documentFingerprints(documents):
+    return dict((rsid, fingerprint(doc)) for rsid, doc in documents.iteritems())
+
+def compareChromosome(documents, oldFingerprints):
+    # Without stored fingerprints every SNP is an insert
+    changes = ChromosomeDelta()
+    if oldFingerprints is None:
+        oldFingerprints = {}
+    for rsid, doc in documents.iteritems():
+        newPrint = fingerprint(doc)
+        changes.fingerprints[rsid] = newPrint
+        oldPrint = oldFingerprints.get(rsid)
+        if oldPrint is None:
+            changes.inserts.append(doc)
+        elif oldPrint != newPrint:
+            changes.updates.append(doc)
+            if oldPrint[0] != newPrint[0]:
+                changes.sigUpdates.append(doc)
+            if oldPrint[1] != newPrint[1]:
+                changes.lociUpdates.append(doc)
+    changes.deletes = [rsid for rsid in oldFingerprints if rsid not in documents]
+    return changes
+
+def inSql(count):
+    return "(" + ", ".join(["%s"] * count) + ")"
+
+def valuesSql(columnCount, rowCount):
+    # VALUES rows with placeholders for rowCount rows
+    return ", ".join([inSql(columnCount)] * rowCount)
+
+def insertLoci(cursor, snpDocuments):
+    # One multi-row INSERT for the loci of (snp id, document) pairs
+    values = []
+    rowCount = 0
+    for snpId, doc in snpDocuments:
+        for locus in doc["loci"]:
+            values.extend([locus["mrna_acc"], locus["gene"], locus["class"], snpId])
+            rowCount += 1
+    if rowCount > 0:
+        cursor.execute(batchInsertSql("locus", ["mrna_acc", "gene", "class", "snp_id"], rowCount), values)
+
+def applyRelationalDelta(cursor, curChr, changes, result, batchSize, sigUpdateSql):
+    # Apply a ChromosomeDelta to the snp/locus tables in the caller's
+    # transaction and set the delta times of result. sigUpdateSql(rowCount)
+    # returns the batched upsert that sets has_sig for rowCount
+    # (id, rsid, chr, has_sig) rows.
+    cursor.execute("SELECT rsid, id FROM snp WHERE chr = %s", [curChr])
+    snpIds = dict(cursor.fetchall())
+
+    # Loci first, then their SNPs
+    deleteStart = time.time()
+    deleteIds = [snpIds[rsid] for rsid in changes.deletes if rsid in snpIds]
+    for batch in batches(deleteIds, batchSize):
+        cursor.execute("DELETE FROM locus WHERE snp_id IN " + inSql(len(batch)), batch)
+        cursor.execute("DELETE FROM snp WHERE id IN " + inSql(len(batch)), batch)
+    result.deltaDeleteTime = time.time() - deleteStart
+
+    # An update of a SNP the table does not have (e.g. the data was reloaded
+    # since the fingerprints were written) becomes an insert
+    inserts = changes.inserts + [doc for doc in changes.updates if doc["rsid"] not in snpIds]
+
+    # has_sig in place, loci replaced where they changed
+    updateStart = time.time()
+    for batch in batches([doc for doc in changes.sigUpdates if doc["rsid"] in snpIds], batchSize):
+        values = []
+        for doc in batch:
+            values.extend([snpIds[doc["rsid"]], doc["rsid"], doc["chr"], doc["has_sig"]])
+        cursor.execute(sigUpdateSql(len(batch)), values)
+    for batch in batches([doc for doc in changes.lociUpdates if doc["rsid"] in snpIds], batchSize):
+        ids = [snpIds[doc["rsid"]] for doc in batch]
+        cursor.execute("DELETE FROM locus WHERE snp_id IN " + inSql(len(ids)), ids)
+        insertLoci(cursor, zip(ids, batch))
+    result.deltaUpdateTime = time.time() - updateStart
+
+    # New SNPs get primary keys past the current maximum id
+    insertStart = time.time()
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM snp")
+    nextId = cursor.fetchone()[0] + 1
+    for batch in batches(inserts, batchSize):
+        ids = range(nextId, nextId + len(batch))
+        values = []
+        for snpId, doc in zip(ids, batch):
+            values.extend([snpId, doc["rsid"], doc["chr"], doc["has_sig"]])
+        cursor.execute(batchInsertSql("snp", ["id", "rsid", "chr", "has_sig"], len(batch)), values)
+        insertLoci(cursor, zip(ids, batch))
+        nextId += len(batch)
+    result.deltaInsertTime = time.time() - insertStart
@@ -0,0 +1,65 @@
+def rsidKey(rsid):
+    # Sort key for rsids; data files are ordered by the numeric part
+    if rsid.startswith('rs') and rsid[2:].isdigit():
+        return int(rsid[2:])
+    return rsid
+
+def newDocument(snp):
+    return {"rsid":snp.rsid, "chr":snp.chr, "has_sig":snp.hasSig, "loci":[]}
+
+def newLocus(locus):
+    return {"mrna_acc":locus.mrnaAcc, "gene":locus.gene, "class":locus.locusClass}
+
+def streamDocuments(snps, loci):
+    # Merge-join a SNP stream and a loci stream that are both ordered by rsid
+    # and yield one SNP/loci document at a time, as soon as its run of loci
+    # has ended. Only the current document is held in memory. Loci without a
+    # matching SNP are dropped, as in the dictionary based assembly.
+    lociIter = iter(loci)
+    curLocus = next(lociIter, None)
+    lastLociKey = None
+    lastSnpKey = None
+    for snp in snps:
+        doc = newDocument(snp)
+        snpKey = rsidKey(snp.rsid)
+        if lastSnpKey is not None and snpKey < lastSnpKey:
+            raise ValueError("SNP data is not ordered by rsid at " + snp.rsid + "; load without streaming")
+        lastSnpKey = snpKey
+        while curLocus is not None:
+            lociKey = rsidKey(curLocus.rsid)
+            if lastLociKey is not None and lociKey < lastLociKey:
+                raise ValueError("Loci data is not ordered by rsid at " + curLocus.rsid + "; load without streaming")
+            lastLociKey = lociKey
+            if lociKey > snpKey:
+                break
+            if lociKey == snpKey:
+                doc["loci"].append(newLocus(curLocus))
+            curLocus = next(lociIter, None)
+        yield doc
+
+def documentSize(doc):
+    # Rough BSON size of a SNP/loci document, without encoding it
+    size = 64 + len(doc["rsid"]) + len(doc["chr"])
+    for locus in doc["loci"]:
+        size += 56 + len(locus["mrna_acc"]) + len(locus["gene"]) + len(locus["class"])
+    return size
+
+def documentBatches(documents, maxDocuments, maxBytes=None):
+    # Group documents into lists bounded by document count and, if given,
+    # by estimated size in bytes. Yields (batch, estimated bytes).
+    batch = []
+    batchBytes = 0
+    for doc in documents:
+        docBytes = documentSize(doc)
+        if batch and maxBytes is not None and batchBytes + docBytes > maxBytes:
+            yield batch, batchBytes
+            batch = []
+            batchBytes = 0
+        batch.append(doc)
+        batchBytes += docBytes
+        if len(batch) >= maxDocuments:
+            yield batch, batchBytes
+            batch = []
+            batchBytes = 0
+    if batch:
+        yield batch, batchBytes
@@ -0,0 +1,624 @@
+import argparse
+import functools, getpass, sys, time
+from result import Result
+from timing import QueryTimer, QUERY_TYPES
+from resultsink import ResultSinks, runInfo
+from reporter import Reporters, GSpreadTarget, reportTarget
+from workload import chromosomeList, queryParams, GENES
+from backends import loadBackend, BACKENDS
+from loadgen import runClosedLoop, loadResults
+from openloop import runOpenLoop, openLoopResults, parseRates
+from sampler import ResourceSampler
+from profiler import phaseProfiler
+from bitmap import BitmapIndex, BITMAP_QUERY_TYPES
+from snpreader import chromosomeFilePaths
+from querycache import QueryCache, applyCacheCounts, outcomeTimers, timeCachedQuery, CACHE_OUTCOMES
+from lookup import readRsids, sampleRsids, runLookup, LOOKUP_CHUNK, LOOKUP_MODES
+from parallel import loadInParallel
+
+def loadChromosomeJob(name, args, path, idRanges, curChr):
+    # Worker process entry point for --jobs. Connections and clients must
+    # not cross a fork, so each job connects its own backend.
+    backend = loadBackend(name, args)
+    backend.connect()
+    backend.idRanges = idRanges
+    try:
+        print backend.label + ": chromosome " + str(curChr)
+        sys.stdout.flush()
+        result = backend.loadChromosome(curChr, path)
+        return result, backend.workerResults, backend.batchRows
+    finally:
+        backend.close()
+
+def main(scriptName, argv=None, defaults=None):
+    # Benchmark driver shared by benchmark.py and the per-backend scripts.
+    # scriptName names the output files; argv defaults to the command line.
+    # defaults overrides option defaults, so a script keeps its own load
+    # conditions unless they are given on its command line.
+
+    # Get command line arguments
+    parser = argparse.ArgumentParser(description='Load SNP and locus data and run the query workload against one or more backends')
+    parser.add_argument('--backends', type=str, help='Backends to benchmark, comma separated (' + ', '.join(sorted(BACKENDS)) + ')')
+    parser.add_argument('--dev', action='store_true', help='Only load chromosome 21 for development testing')
+    parser.add_argument('--path', help='Path to chromosome data')
+    parser.add_argument('--start', type=str, help='Chromosome to start load from')
+    parser.add_argument('--noload', action='store_true', help='Skip schema creation and loading, query existing data')
+    parser.add_argument('--resume', action='store_true', help='Keep loaded data, skip chromosomes the load manifest records as loaded and remove the rows of a half-loaded one')
+    parser.add_argument('--delta', action='store_true', help='Apply only the inserts, updates and deletes since the stored per-chromosome fingerprints to the loaded data')
+    parser.add_argument('--fingerprints', type=str, help='Directory of the fingerprint files used by --delta (default fingerprints)')
+    parser.add_argument('--db', type=str, help='Database name')
+    parser.add_argument('--yhost', type=str, help='MySQL host')
+    parser.add_argument('--ohost', type=str, help='MongoDB host')
+    parser.add_argument('--coll', type=str, help='MongoDB collection')
+    parser.add_argument('--username', type=str, help='MySQL/Postgres username')
+    parser.add_argument('--password', type=str, help='MySQL password')
+    parser.add_argument('--batch', type=int, help='Rows or documents per insert batch')
+    parser.add_argument('--jobs', type=int, help='Number of chromosomes to load concurrently in worker processes')
+    parser.add_argument('--loadfile', action='store_true', help='MySQL: assign keys client-side and bulk load with LOAD DATA LOCAL INFILE')
+    parser.add_argument('--copy', '--pgcopy', dest='pgload', action='store_const', const='copy', help='PostgreSQL: load with COPY FROM STDIN (default for benchmark.py)')
+    parser.add_argument('--insert', dest='pgload', action='store_const', const='insert', help='PostgreSQL: load with one INSERT per row or document (default for the PostgreSQL loaders)')
+    parser.add_argument('--streamload', action='store_true', help='MongoDB/PostgreSQL json: assemble and insert documents while streaming files (requires rsid-ordered data)')
+    parser.add_argument('--bulk', dest='mongoload', action='store_const', const='bulk', help='MongoDB: insert all documents of a chromosome in one call')
+    parser.add_argument('--single', dest='mongoload', action='store_const', const='single', help='MongoDB: insert one document per call (default for mongo-loader.py)')
+    parser.add_argument('--mongoimport', action='store_true', help='MongoDB: bulk insert by piping json documents to mongoimport')
+    parser.add_argument('--numInsertionWorkers', type=int, help='MongoDB: number of mongoimport insertion workers')
+    parser.add_argument('--batchbytes', type=int, help='MongoDB: also limit each insert batch to about this many bytes of documents')
+    parser.add_argument('--workers', type=int, help='MongoDB: insert batches from this many writer threads')
+    parser.add_argument('--batchlog', action='store_true', help='MongoDB: write the latency of every insert batch to a batches file')
+    parser.add_argument('--tag', type=str, help='Tag to place in results file')
+    parser.add_argument('--indexes', action='store_true', help='Create indexes')
+    parser.add_argument('--queries', action='store_true', help='Run queries')
+    parser.add_argument('--geneset', action='store_true', help='Run the gene and gene/significance queries for each gene in the gene list')
+    parser.add_argument('--locusgene', action='store_true', help='MySQL/PostgreSQL: count the gene query from the locus table alone, without joining snp')
+    parser.add_argument('--warmup', type=int, help='Number of query runs to discard before measuring')
+    parser.add_argument('--runs', type=int, help='Number of measured query runs')
+    parser.add_argument('--bitmaps', action='store_true', help='Build compressed has_sig, gene and class bitmaps during the load and also answer the count queries from them')
+    parser.add_argument('--cache', type=int, help='Also run each query pass through an LRU result cache of CACHE entries')
+    parser.add_argument('--lookup', type=str, help='Batch look up the rsids in FILE (one per line, or the ID column of a VCF)')
+    parser.add_argument('--lookupsample', type=int, help='Batch look up N rsids sampled from the data files')
+    parser.add_argument('--lookupchunk', type=int, help='rsids per IN list, $in query or temporary table insert (default ' + str(LOOKUP_CHUNK) + ')')
+    parser.add_argument('--lookupmode', type=str, help='SQL batch lookup: ' + ' or '.join(LOOKUP_MODES) + ' (chunked IN lists or a temporary table join, default in)')
+    parser.add_argument('--stream', action='store_true', help='Stream batch lookup rows back as they arrive instead of collecting them first')
+    parser.add_argument('--loadgen', type=str, help='Run the closed-loop load generator with each of these client counts, comma separated (e.g. 1,2,4,8)')
+    parser.add_argument('--duration', type=int, help='Seconds to run the load generator at each client count')
+    parser.add_argument('--processes', action='store_true', help='Run load generator clients as processes instead of threads')
+    parser.add_argument('--mix', type=str, help='Query types for the load generator, comma separated (default all)')
+    parser.add_argument('--rate', type=str, help='Run the open-loop benchmark at fixed arrival rates, e.g. qryByGene=2000,qryByClinSig=5')
+    parser.add_argument('--ratesteps', type=str, help='Multipliers applied to --rate for each open-loop step, comma separated (default 1)')
+    parser.add_argument('--connections', type=int, help='Connections serving the open-loop arrivals')
+    parser.add_argument('--sample', type=float, help='Sample client CPU, RSS, disk and server CPU every SAMPLE seconds during each phase')
+    parser.add_argument('--timeseries', action='store_true', help='Write every resource sample to a time-series file')
+    parser.add_argument('--profile', action='store_true', help='Write a cProfile .pstats file per chromosome and phase')
+    parser.add_argument('--profilemem', action='store_true', help='With --profile, also write the top memory allocations per chromosome and phase')
+    parser.add_argument('--serverproc', type=str, help='Database server process name for CPU sampling (default: per backend)')
+    parser.add_argument('--format', type=str, help='Also write results as jsonl and/or csv, comma separated')
+    parser.add_argument('--report', type=str, help='Also send results in the background to file:PATH and/or http(s)://URL targets, comma separated')
+    parser.add_argument('--remote', action='store_true', help='Enable remote reporting to a Google spreadsheet')
+    parser.add_argument('--rkey', help='Google document key')
+    if defaults is not None:
+        parser.set_defaults(**defaults)
+    args = parser.parse_args(argv)
+
+    # Set script version
+    scriptVersion = "2.0"
+
+    # Set default variables
+    backendNames = ['mysql']
+    dev = False
+    path = ''
+    start = '1'
+    tag = ''
+    resultFormats = []
+    reportTargets = []
+    warmup = 0
+    queryRuns = 10
+    loadgenClients = []
+    duration = 30
+    queryMix = QUERY_TYPES
+    rates = {}
+    rateSteps = [1.0]
+    connections = 8
+    sampleInterval = None
+    lookupChunk = LOOKUP_CHUNK
+    lookupMode = 'in'
+    jobs = 1
+
+    # Update any present from CLI
+    if args.backends is not None: # Backends to benchmark, in order
+        backendNames = args.backends.split(',')
+    if args.dev:
+        dev = True
+    if args.path is not None: # If set, use as root path for chromosome data
+        path = args.path
+    if args.start is not None: # Chromosome to start load from
+        start = args.start
+    if args.tag is not None: # Tag to place in results file
+        tag = args.tag
+    if args.format is not None: # Extra results formats
+        resultFormats = args.format.split(',')
+    if args.report is not None: # Remote report targets
+        reportTargets = args.report.split(',')
+    if args.warmup is not None: # Query runs discarded before measuring
+        warmup = args.warmup
+    if args.runs is not None: # Measured query runs
+        queryRuns = args.runs
+    if args.loadgen is not None: # Client counts for the load generator
+        loadgenClients = [int(clients) for clients in args.loadgen.split(',')]
+    if args.duration is not None: # Seconds per load generator step
+        duration = args.duration
+    if args.mix is not None: # Load generator query types
+        queryMix = args.mix.split(',')
+        for queryType in queryMix:
+            if queryType not in QUERY_TYPES:
+                parser.error("unknown query type " + queryType + "; expected one of " + ', '.join(QUERY_TYPES))
+    if args.rate is not None: # Open-loop arrival rates per query type
+        try:
+            rates = parseRates(args.rate)
+        except ValueError:
+            parser.error("--rate must be a comma separated list of queryType=rate")
+        for queryType in rates:
+            if queryType not in QUERY_TYPES:
+                parser.error("unknown query type " + queryType + "; expected one of " + ', '.join(QUERY_TYPES))
+    if args.ratesteps is not None: # Open-loop rate multipliers
+        rateSteps = [float(step) for step in args.ratesteps.split(',')]
+    if args.connections is not None: # Open-loop connections
+        connections = args.connections
+    if args.sample is not None and args.sample > 0: # Resource sampling interval
+        sampleInterval = args.sample
+    if args.jobs is not None and args.jobs > 1: # Parallel chromosome loads
+        jobs = args.jobs
+    if args.lookupchunk is not None: # rsids per batch lookup chunk
+        lookupChunk = args.lookupchunk
+    if args.lookupmode is not None: # SQL batch lookup mode
+        lookupMode = args.lookupmode
+        if lookupMode not in LOOKUP_MODES:
+            parser.error("unknown lookup mode " + lookupMode + "; expected one of " + ', '.join(LOOKUP_MODES))
+
+    if args.delta and args.resume:
+        parser.error("--delta and --resume cannot be combined; a delta already keeps the loaded data")
+
+    if args.bitmaps and args.noload:
+        parser.error("--bitmaps are built during the load and cannot be combined with --noload")
+
+    if args.mongoimport and (args.batch is not None or args.batchbytes is not None or args.workers is not None):
+        parser.error("--mongoimport batches its own inserts and cannot be combined with --batch, --batchbytes or --workers")
+
+    if jobs > 1 and args.delta:
+        parser.error("--jobs only applies to full loads and cannot be combined with --delta")
+
+    # Check backend names before any database is touched
+    for name in backendNames:
+        if name not in BACKENDS:
+            parser.error("unknown backend " + name + "; expected one of " + ', '.join(sorted(BACKENDS)))
+        if jobs > 1 and not loadBackend(name, args).parallelLoad:
+            parser.error("backend " + name + " cannot load chromosomes in worker processes; run it without --jobs")
+
+    chromosomes = chromosomeList(dev, start)
+
+    # rsids for the batch lookup, read once and shared by every backend
+    lookupRsids = []
+    if args.lookup is not None:
+        lookupRsids = readRsids(args.lookup)
+    elif args.lookupsample is not None:
+        lookupRsids = sampleRsids(path, chromosomes, args.lookupsample)
+
+    # Open results file, print headers
+    resultsFileName = 'results-' + scriptName
+    if tag != "":
+        resultsFileName += '-' + tag
+    resultSinks = ResultSinks(resultFormats, resultsFileName, runInfo(','.join(backendNames), scriptVersion, args))
+    resultsFileName += '.txt'
+    resultsFile = open(resultsFileName, 'w')
+    resultsFile.write(scriptVersion + '\n')
+    resultsFile.write(Result().toHeader() + '\n')
+
+    # Results are sent to remote targets from background threads, in batches
+    # and off the timed path
+    reporters = Reporters(Result().headerArr())
+    if args.remote and args.rkey is not None: # If set to remote log and document key is present, log to GDocs
+        gusername = raw_input("Enter Google username: ")
+        gpassword = getpass.getpass("Enter Google password: ")
+        reporters.add(GSpreadTarget(args.rkey, tag, gusername, gpassword))
+    for reportSpec in reportTargets:
+        reporters.add(reportTarget(reportSpec))
+
+    # Per-batch latency log for batched document inserts
+    if args.batchlog:
+        batchFileName = 'batches-' + scriptName
+        if tag != "":
+            batchFileName += '-' + tag
+        batchFileName += '.txt'
+        batchFile = open(batchFileName, 'w')
+        batchFile.write('\t'.join(["Chromosome", "Batch", "Documents", "Est. Bytes", "Latency", "Worker"]) + '\n')
+
+    # Latency distribution of each load generator step
+    if loadgenClients or rates:
+        histogramFileName = 'histograms-' + scriptName
+        if tag != "":
+            histogramFileName += '-' + tag
+        histogramFileName += '.txt'
+        histogramFile = open(histogramFileName, 'w')
+        histogramFile.write('\t'.join(["Method", "Clients", "Query Type", "Latency", "Percentile", "Count"]) + '\n')
+
+    # Resource sampler, with an optional time series of every sample
+    sampler = None
+    if sampleInterval is not None:
+        timeSeriesFile = None
+        if args.timeseries:
+            timeSeriesFileName = 'resources-' + scriptName
+            if tag != "":
+                timeSeriesFileName += '-' + tag
+            timeSeriesFile = open(timeSeriesFileName + '.txt', 'w')
+        sampler = ResourceSampler(sampleInterval, timeSeriesFile=timeSeriesFile)
+
+    # Profiles of each chromosome and phase; a no-op without --profile
+    profileFileName = 'profile-' + scriptName
+    if tag != "":
+        profileFileName += '-' + tag
+    profiler = phaseProfiler(args.profile, profileFileName, args.profilemem)
+
+    def startSection(backend, phase, chromosome=''):
+        # Begin resource sampling and profiling of a measured section
+        if sampler is not None:
+            sampler.start(backend.label + "-" + phase)
+        profiler.start(chromosome, backend.label + "-" + phase)
+
+    def stopSection(results):
+        # Attach the resource summary of the section to each of its result rows
+        profiler.stop()
+        if sampler is not None:
+            summary = sampler.stop()
+            for result in results:
+                summary.apply(result)
+
+    # Bitmaps of the backend being benchmarked, built during its load
+    bitmaps = None
+
+    # Query result cache of the backend being benchmarked; loads invalidate
+    # the chromosomes they commit
+    queryCache = None
+
+    def buildBitmaps(curChr, result):
+        # Add a chromosome to the bitmaps, timed apart from the database load
+        bitmapStart = time.time()
+        bitmaps.addChromosome(*chromosomeFilePaths(path, curChr))
+        result.bitmapBuildTime = time.time() - bitmapStart
+
+    def writeResult(result):
+        resultsFile.write(result.toString() + '\n')
+        resultSinks.write(result)
+        reporters.write(result)
+
+    def loadSequentially(backend, loadChromosomes):
+        # Load (or apply the delta to) each chromosome in this process,
+        # sampled and profiled as its own section
+        for curChr in loadChromosomes:
+            print backend.label + ": chromosome " + str(curChr)
+            sys.stdout.flush()
+            if args.delta:
+                startSection(backend, "delta", curChr)
+                result = backend.deltaChromosome(curChr, path)
+            else:
+                startSection(backend, "load", curChr)
+                result = backend.loadChromosome(curChr, path)
+            stopSection([result])
+            yield result, backend.workerResults, backend.batchRows
+
+    def runQueries(backend):
+        # Single query runs, every query type per run; with bitmaps or a cache,
+        # each run also times the queries against the bitmaps and through the
+        # cache (summarized apart for hits and misses)
+        queryTimer = QueryTimer(warmup)
+        bitmapTimer = QueryTimer(warmup)
+        cachedTimers = outcomeTimers()
+        measuredCounts = None
+        for z in range(1, warmup + queryRuns + 1):
+            result = backend.newResult("-Qry" + str(z))
+            print backend.label + ": running queries, count " + str(z)
+            sys.stdout.flush()
+            startSection(backend, "query")
+            for queryType in QUERY_TYPES:
+                setattr(result, queryType, queryTimer.time(queryType, backend.runQuery, queryType, queryParams(queryType)))
+            stopSection([result])
+            if bitmaps is not None:
+                bitmapResult = backend.newResult("-BitmapQry" + str(z))
+                for queryType in BITMAP_QUERY_TYPES:
+                    setattr(bitmapResult, queryType, bitmapTimer.time(queryType, bitmaps.runQuery, queryType, queryParams(queryType)))
+            if queryCache is not None:
+                if z == warmup + 1:
+                    measuredCounts = queryCache.counts()
+                cachedResult = backend.newResult("-CachedQry" + str(z))
+                runCounts = queryCache.counts()
+                for queryType in QUERY_TYPES:
+                    setattr(cachedResult, queryType, timeCachedQuery(queryCache, cachedTimers if z > warmup else None, backend, queryType, queryParams(queryType)))
+                applyCacheCounts(cachedResult, runCounts, queryCache.counts())
+            if z <= warmup:
+                continue
+            writeResult(result)
+            if bitmaps is not None:
+                writeResult(bitmapResult)
+            if queryCache is not None:
+                writeResult(cachedResult)
+
+        # Summary statistics for the measured runs
+        for statResult in queryTimer.summaryResults(backend.label + "-Qry", tag):
+            writeResult(statResult)
+        if bitmaps is not None:
+            for statResult in bitmapTimer.summaryResults(backend.label + "-BitmapQry", tag, BITMAP_QUERY_TYPES):
+                writeResult(statResult)
+        if queryCache is not None:
+            for outcome in CACHE_OUTCOMES:
+                for statResult in cachedTimers[outcome].summaryResults(backend.label + "-CachedQry" + outcome, tag):
+                    if measuredCounts is not None:
+                        applyCacheCounts(statResult, measuredCounts, queryCache.counts())
+                    writeResult(statResult)
+
+    def runCachedPass(backend, method):
+        # One pass of the query types (and the gene set) through the cache,
+        # left out of the cached summaries. Run before a load to fill the
+        # cache, and after it to show which entries the load's invalidations
+        # dropped (misses) and kept (hits).
+        result = backend.newResult(method)
+        print backend.label + ": cached query pass " + method
+        sys.stdout.flush()
+        passCounts = queryCache.counts()
+        for queryType in QUERY_TYPES:
+            setattr(result, queryType, timeCachedQuery(queryCache, None, backend, queryType, queryParams(queryType)))
+        if args.geneset:
+            for g in GENES:
+                for queryType in ['qryByGene', 'qryByGeneSig']:
+                    queryCache.runQuery(backend, queryType, queryParams(queryType, gene=g))
+        applyCacheCounts(result, passCounts, queryCache.counts())
+        print "\t" + str(result.cacheHits) + " hits, " + str(result.cacheMisses) + " misses, " + str(result.cacheEvictions) + " evictions"
+        writeResult(result)
+
+    def runGeneSet(backend):
+        # Gene and gene/significance queries over the gene list. Warmup passes
+        # over the gene list are timed but not reported.
+        queryTimer = QueryTimer(warmup * len(GENES))
+        bitmapTimer = QueryTimer(warmup * len(GENES))
+        cachedTimers = outcomeTimers()
+        measuredCounts = None
+        for z in range(1, warmup + queryRuns + 1):
+            for g in GENES:
+                result = backend.newResult("-QrySet" + str(z))
+                result.tag = tag + "-" + g + "/" + str(z)
+                print backend.label + ": running queries: " + g + "/" + str(z)
+                sys.stdout.flush()
+                startSection(backend, "queryset")
+                for queryType in ['qryByGene', 'qryByGeneSig']:
+                    setattr(result, queryType, queryTimer.time(queryType, backend.runQuery, queryType, queryParams(queryType, gene=g)))
+                stopSection([result])
+                if bitmaps is not None:
+                    bitmapResult = backend.newResult("-BitmapQrySet" + str(z))
+                    bitmapResult.tag = result.tag
+                    for queryType in ['qryByGene', 'qryByGeneSig']:
+                        setattr(bitmapResult, queryType, bitmapTimer.time(queryType, bitmaps.runQuery, queryType, queryParams(queryType, gene=g)))
+                if queryCache is not None:
+                    if z == warmup + 1 and measuredCounts is None:
+                        measuredCounts = queryCache.counts()
+                    cachedResult = backend.newResult("-CachedQrySet" + str(z))
+                    cachedResult.tag = result.tag
+                    runCounts = queryCache.counts()
+                    for queryType in ['qryByGene', 'qryByGeneSig']:
+                        setattr(cachedResult, queryType, timeCachedQuery(queryCache, cachedTimers if z > warmup else None, backend, queryType, queryParams(queryType, gene=g)))
+                    applyCacheCounts(cachedResult, runCounts, queryCache.counts())
+                if z <= warmup:
+                    continue
+                writeResult(result)
+                if bitmaps is not None:
+                    writeResult(bitmapResult)
+                if queryCache is not None:
+                    writeResult(cachedResult)
+
+        # Summary statistics for the measured runs
+        for statResult in queryTimer.summaryResults(backend.label + "-QrySet", tag):
+            writeResult(statResult)
+        if bitmaps is not None:
+            for statResult in bitmapTimer.summaryResults(backend.label + "-BitmapQrySet", tag):
+                writeResult(statResult)
+        if queryCache is not None:
+            for outcome in CACHE_OUTCOMES:
+                for statResult in cachedTimers[outcome].summaryResults(backend.label + "-CachedQrySet" + outcome, tag):
+                    if measuredCounts is not None:
+                        applyCacheCounts(statResult, measuredCounts, queryCache.counts())
+                    writeResult(statResult)
+
+    def runBatchLookup(backend):
+        # The whole rsid list in chunks, reported as rsids per second
+        method = "-Lookup-" + lookupMode + str(lookupChunk)
+        if args.stream:
+            method += "-Stream"
+        result = backend.newResult(method)
+        print backend.label + ": looking up " + str(len(lookupRsids)) + " rsids"
+        sys.stdout.flush()
+        startSection(backend, "lookup")
+        runLookup(backend, lookupRsids, lookupChunk, lookupMode, args.stream, result)
+        stopSection([result])
+        result.calculate()
+        print "\t" + str(result.lookupFound) + " found, " + str(result.lookupRows) + " rows in " + str(result.lookupTime) + "s, " + str(result.lookupRate) + " rsids/s"
+        writeResult(result)
+
+    def runLoadGenerator(name, backend):
+        # Closed-loop steps with increasing client counts; each client has its
+        # own connection and issues its next query as soon as one returns
+        method = backend.label + "-Load"
+        if args.processes:
+            method += "-Processes"
+        for clients in loadgenClients:
+            print backend.label + ": load generator, " + str(clients) + " clients for " + str(duration) + "s"
+            sys.stdout.flush()
+            startSection(backend, "loadgen")
+            histograms, elapsed = runClosedLoop(name, args, queryMix, clients, duration, args.processes)
+            stepResults = loadResults(method + str(clients), tag, clients, histograms, elapsed)
+            stopSection(stepResults)
+            for result in stepResults:
+                print "\t" + result.queryType + ": " + str(result.queryCount) + " queries, " + str(result.throughput) + " qps, p99 " + str(result.latencyP99) + "s"
+                writeResult(result)
+            for queryType in sorted(histograms):
+                for latency, percentile, count in histograms[queryType].distribution():
+                    histogramFile.write('\t'.join([method + str(clients), str(clients), queryType, str(latency / 1e9), str(percentile), str(count)]) + '\n')
+
+    def runRateSteps(name, backend):
+        # Open-loop steps at increasing multiples of the target rates. Arrivals
+        # are sent on schedule whether or not earlier queries have returned, and
+        # latency is measured from the intended send time.
+        method = backend.label + "-Rate"
+        saturatedAt = None
+        for step in rateSteps:
+            stepRates = dict([(queryType, rate * step) for queryType, rate in rates.items()])
+            print backend.label + ": open loop at " + ', '.join([queryType + "=" + str(rate) + "/s" for queryType, rate in sorted(stepRates.items())]) + " for " + str(duration) + "s"
+            sys.stdout.flush()
+            startSection(backend, "rate")
+            workers, elapsed = runOpenLoop(name, args, stepRates, duration, connections)
+            stepResults = openLoopResults(method + "x" + str(step), tag, connections, stepRates, duration, workers, elapsed)
+            stopSection([result for result, latency in stepResults])
+            for result, latency in stepResults:
+                print "\t" + result.queryType + ": " + str(result.throughput) + " of " + str(result.targetRate) + " qps, p99 " + str(result.latencyP99) + "s, backlog " + str(result.backlog) + (", SATURATED" if result.saturated else "")
+                writeResult(result)
+                for latencyValue, percentile, count in latency.distribution():
+                    histogramFile.write('\t'.join([result.method, str(connections), result.queryType, str(latencyValue / 1e9), str(percentile), str(count)]) + '\n')
+                if result.saturated and result.queryType == "all" and saturatedAt is None:
+                    saturatedAt = result.targetRate
+        if saturatedAt is not None:
+            print backend.label + ": saturated at " + str(saturatedAt) + " qps offered"
+        else:
+            print backend.label + ": not saturated up to " + str(sum(rates.values()) * max(rateSteps)) + " qps offered"
+
+    for name in backendNames:
+        # Drivers are imported here, so only the benchmarked backends need them
+        backend = loadBackend(name, args)
+        print "Backend " + backend.label
+        sys.stdout.flush()
+        backend.connect()
+        if sampler is not None:
+            sampler.serverProcess = args.serverproc or backend.serverProcess
+            backend.sampler = sampler
+        if args.profile:
+            backend.profiler = profiler
+        if args.bitmaps:
+            bitmaps = BitmapIndex()
+        if args.cache is not None and args.cache > 0:
+            queryCache = QueryCache(args.cache)
+
+        if not args.noload:
+            backend.createSchema()
+            loadChromosomes = chromosomes
+            if args.resume:
+                loadChromosomes = backend.resumeChromosomes(chromosomes)
+                skipped = [curChr for curChr in chromosomes if curChr not in loadChromosomes]
+                if skipped:
+                    print backend.label + ": already loaded, skipping chromosomes " + ', '.join(skipped)
+                if bitmaps is not None:
+                    # Skipped chromosomes are in the database but not yet in the bitmaps
+                    for curChr in skipped:
+                        bitmaps.addChromosome(*chromosomeFilePaths(path, curChr))
+
+            cachePass = queryCache is not None and (args.queries or args.geneset)
+            if cachePass:
+                runCachedPass(backend, "-CachedQryPreLoad")
+                loadCounts = queryCache.counts()
+
+            totalResult = backend.newResult("-Total", "All")
+            totalResult.totalSnps = 0
+            totalResult.totalLoci = 0
+            totalResult.totalDocuments = 0
+            if args.delta:
+                totalResult.deltaInserts = 0
+                totalResult.deltaUpdates = 0
+                totalResult.deltaDeletes = 0
+            loadStart = time.time()
+            if jobs > 1:
+                # Reserve key ranges up front, then load chromosomes
+                # concurrently; the whole parallel load is one section
+                print backend.label + ": loading " + str(len(loadChromosomes)) + " chromosomes with " + str(jobs) + " jobs"
+                sys.stdout.flush()
+                totalResult.method += "-Jobs" + str(jobs)
+                backend.reserveIds(loadChromosomes, path)
+                startSection(backend, "load")
+                chromosomeResults = loadInParallel(functools.partial(loadChromosomeJob, name, args, path, backend.idRanges), loadChromosomes, jobs)
+            else:
+                chromosomeResults = loadSequentially(backend, loadChromosomes)
+            for result, workerResults, batchRows in chromosomeResults:
+                curChr = result.chromosome
+                if queryCache is not None:
+                    queryCache.invalidate(str(curChr))
+                if bitmaps is not None:
+                    buildBitmaps(curChr, result)
+                print result.toTerm()
+                writeResult(result)
+                for workerResult in workerResults:
+                    writeResult(workerResult)
+                if args.batchlog:
+                    for batchRow in batchRows:
+                        batchFile.write('\t'.join(batchRow) + '\n')
+                totalResult.totalSnps += result.totalSnps or 0
+                totalResult.totalLoci += result.totalLoci or 0
+                totalResult.totalDocuments += result.totalDocuments or 0
+                if args.delta:
+                    totalResult.deltaInserts += result.deltaInserts
+                    totalResult.deltaUpdates += result.deltaUpdates
+                    totalResult.deltaDeletes += result.deltaDeletes
+                if bitmaps is not None:
+                    totalResult.bitmapBuildTime = (totalResult.bitmapBuildTime or 0) + result.bitmapBuildTime
+
+            if jobs > 1:
+                stopSection([totalResult])
+                backend.finishLoad()
+
+            # Wall-clock time for the whole load
+            totalResult.wallTime = time.time() - loadStart
+            if not args.delta:
+                # Fingerprint the loaded chromosomes outside the timed load,
+                # so a later --delta applies only their changes
+                for curChr in loadChromosomes:
+                    backend.recordFingerprints(curChr, path)
+            if bitmaps is not None:
+                totalResult.bitmapBytes = bitmaps.sizeBytes()
+            if cachePass:
+                # The load's invalidations (and any evictions); the cache
+                # serves no queries during it
+                applyCacheCounts(totalResult, loadCounts, queryCache.counts())
+                print backend.label + ": load invalidated " + str(totalResult.cacheInvalidations) + " cache entries"
+            writeResult(totalResult)
+            if cachePass:
+                runCachedPass(backend, "-CachedQryPostLoad")
+
+        if args.indexes:
+            print backend.label + ": creating indexes..."
+            sys.stdout.flush()
+            startSection(backend, "index")
+            result = backend.createIndexes()
+            stopSection([result])
+            if bitmaps is not None:
+                result.bitmapBytes = bitmaps.sizeBytes()
+                print backend.label + ": index bytes rsid " + str(result.idxRsidBytes) + ", clinsig " + str(result.idxClinSigBytes) + ", gene " + str(result.idxGeneBytes) + "; bitmap bytes " + str(result.bitmapBytes)
+            writeResult(result)
+
+        if args.queries:
+            runQueries(backend)
+        if args.geneset:
+            runGeneSet(backend)
+        if lookupRsids:
+            runBatchLookup(backend)
+        if loadgenClients:
+            runLoadGenerator(name, backend)
+        if rates:
+            runRateSteps(name, backend)
+
+        backend.close()
+
+    resultsFile.close()
+    resultSinks.close()
+    for message in reporters.close():
+        print message
+    if loadgenClients or rates:
+        histogramFile.close()
+    if args.batchlog:
+        batchFile.close()
+    if sampler is not None:
+        sampler.close()
+        if args.timeseries:
+            timeSeriesFile.close()
+    print "Run complete!"
+
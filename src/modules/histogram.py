@@ -0,0 +1,70 @@
+# Bits of sub-bucket resolution; 8 bits keeps every recorded value within
+# 1% of its bucket, about two significant digits as in HdrHistogram
+SUB_BUCKET_BITS = 8
+
+def bucketShift(value):
+    return max(0, value.bit_length() - SUB_BUCKET_BITS)
+
+class LatencyHistogram:
+    # Log-linear histogram of integer latencies (nanoseconds). Buckets are
+    # the value with its low bits cleared, so memory grows with the range of
+    # latencies seen, not the number of samples, and histograms from several
+    # clients or processes merge by adding counts.
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        value = int(value)
+        shift = bucketShift(value)
+        bucket = (value >> shift) << shift
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for bucket, bucketCount in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + bucketCount
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def mean(self):
+        if self.count == 0:
+            return None
+        return float(self.total) / self.count
+
+    def highestEquivalent(self, bucket):
+        # Largest value that falls in bucket, capped at the recorded maximum
+        return min(bucket | ((1 << bucketShift(bucket)) - 1), self.max)
+
+    def percentile(self, pct):
+        # Smallest bucket value at or above pct percent of the samples
+        if self.count == 0:
+            return None
+        target = max(1, int(round(self.count * pct / 100.0)))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return self.highestEquivalent(bucket)
+        return self.max
+
+    def distribution(self):
+        # (value, percentile, cumulative count) for each bucket, ascending
+        rows = []
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            rows.append((self.highestEquivalent(bucket), 100.0 * seen / self.count, seen))
+        return rows
@@ -0,0 +1,164 @@
+import multiprocessing, threading, time
+from result import Result
+from timing import clockNs
+from histogram import LatencyHistogram
+from workload import queryParams, GENES
+from backends import loadBackend
+
+# Latency percentiles reported per query type: (Result field, percentile)
+LATENCY_PERCENTILES = [('latencyP50', 50), ('latencyP95', 95), ('latencyP99', 99), ('latencyP999', 99.9)]
+
+class StartGate:
+    # Holds every client after it connects until all of them have, so the
+    # measured window starts once, for all clients, rather than at each
+    # client's own connect. Its primitives work across threads and across
+    # processes forked after it is created.
+    def __init__(self, clients):
+        self.clients = clients
+        self.arrivals = multiprocessing.Semaphore(0)
+        self.started = multiprocessing.Event()
+        self.startTime = multiprocessing.Value('d', 0.0)
+
+    def arrive(self):
+        # Called once per client, connected or not, so open() never waits
+        # for a client that failed
+        self.arrivals.release()
+
+    def wait(self):
+        # Block until open(), then return the shared start time
+        self.started.wait()
+        return self.startTime.value
+
+    def open(self):
+        # Block until every client has arrived, then start them all
+        for clientId in range(self.clients):
+            self.arrivals.acquire()
+        self.startTime.value = time.time()
+        self.started.set()
+
+def clientLoop(backendName, args, queryTypes, duration, clientId, startGate):
+    # One closed-loop client: its own backend connection, issuing the next
+    # query as soon as the previous one returns until duration has passed
+    # from the start of the run. Clients start at different points of the
+    # query mix so they do not run the same query in lockstep. Returns
+    # ({query type: LatencyHistogram}, time its last query returned).
+    try:
+        backend = loadBackend(backendName, args)
+        backend.connect()
+    finally:
+        startGate.arrive()
+    histograms = dict([(queryType, LatencyHistogram()) for queryType in queryTypes])
+    queryNumber = clientId
+    try:
+        deadline = startGate.wait() + duration
+        runEnd = time.time()
+        while runEnd < deadline:
+            queryType = queryTypes[queryNumber % len(queryTypes)]
+            params = queryParams(queryType, gene=GENES[(queryNumber // len(queryTypes)) % len(GENES)])
+            queryStart = clockNs()
+            backend.runQuery(queryType, params)
+            histograms[queryType].record(clockNs() - queryStart)
+            queryNumber += 1
+            runEnd = time.time()
+    finally:
+        backend.close()
+    return histograms, runEnd
+
+def mergeHistograms(clientHistograms, queryTypes):
+    merged = dict([(queryType, LatencyHistogram()) for queryType in queryTypes])
+    for histograms in clientHistograms:
+        for queryType, histogram in histograms.items():
+            merged[queryType].merge(histogram)
+    return merged
+
+def runThreads(backendName, args, queryTypes, clients, duration, startGate):
+    clientRuns = []
+    errors = []
+    def runClient(clientId):
+        try:
+            clientRuns.append(clientLoop(backendName, args, queryTypes, duration, clientId, startGate))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=runClient, args=(clientId,)) for clientId in range(clients)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    startGate.open()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return clientRuns
+
+# The StartGate of a client process, passed to it when the pool forks
+processStartGate = None
+
+def setProcessStartGate(startGate):
+    global processStartGate
+    processStartGate = startGate
+
+def processClientLoop(backendName, args, queryTypes, duration, clientId):
+    return clientLoop(backendName, args, queryTypes, duration, clientId, processStartGate)
+
+def runProcesses(backendName, args, queryTypes, clients, duration, startGate):
+    # Client processes sidestep the GIL for drivers that hold it while
+    # decoding results. The gate cannot be pickled with a task, so it is
+    # handed to each process by the pool initializer.
+    pool = multiprocessing.Pool(clients, setProcessStartGate, (startGate,))
+    try:
+        pending = [pool.apply_async(processClientLoop, (backendName, args, queryTypes, duration, clientId)) for clientId in range(clients)]
+        startGate.open()
+        clientRuns = [clientResult.get() for clientResult in pending]
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return clientRuns
+
+def runClosedLoop(backendName, args, queryTypes, clients, duration, processes=False):
+    # Run clients concurrent closed-loop clients for duration seconds, timed
+    # from when the last of them has connected to when the last query
+    # returns. Returns ({query type: merged LatencyHistogram}, elapsed
+    # seconds).
+    startGate = StartGate(clients)
+    if processes:
+        clientRuns = runProcesses(backendName, args, queryTypes, clients, duration, startGate)
+    else:
+        clientRuns = runThreads(backendName, args, queryTypes, clients, duration, startGate)
+    runEnd = max([clientRunEnd for histograms, clientRunEnd in clientRuns])
+    return mergeHistograms([histograms for histograms, clientRunEnd in clientRuns], queryTypes), runEnd - startGate.startTime.value
+
+def histogramResult(result, histogram, elapsed):
+    # Fill throughput and latency fields (seconds) from a histogram
+    result.queryCount = histogram.count
+    if elapsed > 0:
+        result.throughput = histogram.count / elapsed
+    if histogram.count == 0:
+        return result
+    result.latencyMean = histogram.mean() / 1e9
+    for field, pct in LATENCY_PERCENTILES:
+        setattr(result, field, histogram.percentile(pct) / 1e9)
+    result.latencyMax = histogram.max / 1e9
+    return result
+
+def loadResults(method, tag, clients, histograms, elapsed):
+    # One result row per query type plus an "all" row over the whole mix
+    results = []
+    total = LatencyHistogram()
+    for queryType in sorted(histograms):
+        result = Result()
+        result.method = method
+        result.tag = tag
+        result.clients = clients
+        result.queryType = queryType
+        results.append(histogramResult(result, histograms[queryType], elapsed))
+        total.merge(histograms[queryType])
+    result = Result()
+    result.method = method
+    result.tag = tag
+    result.clients = clients
+    result.queryType = "all"
+    results.append(histogramResult(result, total, elapsed))
+    return results
@@ -0,0 +1,77 @@
+import random, time
+from snpreader import SnpReader, chromosomeFilePaths
+
+# rsids per IN list, $in batch or temporary table insert
+LOOKUP_CHUNK = 1000
+
+# SQL lookup modes: chunked IN lists, or one join against a temporary table
+LOOKUP_MODES = ['in', 'temp']
+
+# Seed for sampling lookup rsids from the data files
+LOOKUP_SEED = 7
+
+# Batch forms of the relational qryByRsid: one IN list per chunk, or a join
+# with the lookup_rsid temporary table. Loci are left joined, so a SNP
+# without loci is found (as one row of NULL locus columns), as it is by the
+# document backends. Rows end with the snp columns (id, rsid, chr, has_sig).
+RSID_IN_SQL = "SELECT l.*, s.* FROM snp s LEFT JOIN locus l ON l.snp_id = s.id WHERE s.rsid IN "
+RSID_JOIN_SQL = "SELECT l.*, s.* FROM lookup_rsid r JOIN snp s ON s.rsid = r.rsid LEFT JOIN locus l ON l.snp_id = s.id"
+
+def uniqueRsids(rsids):
+    # Drop repeats, keeping the first occurrence's order
+    seen = set()
+    unique = []
+    for rsid in rsids:
+        if rsid not in seen:
+            seen.add(rsid)
+            unique.append(rsid)
+    return unique
+
+def readRsids(filePath):
+    # rsids from a file with one per line, or from the ID column of a VCF
+    # (header lines skipped, ';' separated IDs split, '.' ignored)
+    rsids = []
+    with open(filePath, 'r') as rsidFile:
+        for line in rsidFile:
+            if line.startswith('#'):
+                continue
+            columns = line.rstrip('\r\n').split('\t')
+            field = columns[2] if len(columns) >= 3 else columns[0]
+            rsids.extend([rsid.strip() for rsid in field.split(';') if rsid.strip() not in ('', '.')])
+    return uniqueRsids(rsids)
+
+def sampleRsids(path, chromosomes, count, seed=LOOKUP_SEED):
+    # Reservoir sample of count rsids from the SNP files of chromosomes
+    sampler = random.Random(seed)
+    sample = []
+    seen = 0
+    for curChr in chromosomes:
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+        for snp in SnpReader(curSnpFilePath):
+            seen += 1
+            if len(sample) < count:
+                sample.append(snp.rsid)
+            else:
+                slot = sampler.randint(0, seen - 1)
+                if slot < count:
+                    sample[slot] = snp.rsid
+    return uniqueRsids(sample)
+
+def runLookup(backend, rsids, chunkSize, mode, stream, result):
+    # Time a batch lookup and count the rows and distinct rsids found.
+    # Without stream, every row is collected before the first is counted.
+    lookupStart = time.time()
+    rows = backend.lookupRsids(rsids, chunkSize, mode, stream)
+    if not stream:
+        rows = list(rows)
+    found = set()
+    rowCount = 0
+    for rsid, row in rows:
+        if rowCount == 0:
+            result.lookupFirstRow = time.time() - lookupStart
+        found.add(rsid)
+        rowCount += 1
+    result.lookupTime = time.time() - lookupStart
+    result.lookupCount = len(rsids)
+    result.lookupFound = len(found)
+    result.lookupRows = rowCount
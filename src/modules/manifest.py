@@ -0,0 +1,68 @@
+import time
+
+# Chromosome states in the load manifest
+LOADING = 'loading'
+DONE = 'done'
+
+# Manifest table (or MongoDB collection) in the experimental database
+MANIFEST_NAME = 'load_manifest'
+
+# The same DDL works for MySQL and PostgreSQL
+MANIFEST_TABLE = (
+    "CREATE TABLE IF NOT EXISTS " + MANIFEST_NAME + " ("
+    "  chromosome varchar(5) PRIMARY KEY,"
+    "  state varchar(10) NOT NULL,"
+    "  snps integer,"
+    "  loci integer,"
+    "  documents integer,"
+    "  updated double precision"
+    ")")
+
+def createManifest(cursor):
+    cursor.execute(MANIFEST_TABLE)
+
+def manifestStates(cursor):
+    # {chromosome: state} for every chromosome in the manifest
+    cursor.execute("SELECT chromosome, state FROM " + MANIFEST_NAME)
+    return dict(cursor.fetchall())
+
+def clearManifest(cursor):
+    cursor.execute("DELETE FROM " + MANIFEST_NAME)
+
+def markChromosome(cursor, chromosome, state, snps=None, loci=None, documents=None):
+    # Record a chromosome's state in the caller's transaction. Mark LOADING
+    # and commit before the data, then mark DONE just before the commit of
+    # the chromosome's last rows, so DONE is only visible with all of them.
+    cursor.execute("DELETE FROM " + MANIFEST_NAME + " WHERE chromosome = %s", [chromosome])
+    cursor.execute("INSERT INTO " + MANIFEST_NAME + " (chromosome, state, snps, loci, documents, updated) VALUES (%s, %s, %s, %s, %s, %s)",
+                   [chromosome, state, snps, loci, documents, time.time()])
+
+def deleteDocuments(collection, query):
+    if hasattr(collection, 'delete_many'):
+        collection.delete_many(query)
+    else:
+        collection.remove(query)
+
+def mongoManifestStates(manifestCollection):
+    return dict([(entry["chromosome"], entry["state"]) for entry in manifestCollection.find()])
+
+def markMongoChromosome(manifestCollection, chromosome, state, documents=None):
+    # MongoDB has no transaction around a chromosome's inserts, so a
+    # chromosome left LOADING may have any number of its documents
+    entry = {"chromosome": chromosome, "state": state, "documents": documents, "updated": time.time()}
+    if hasattr(manifestCollection, 'replace_one'):
+        manifestCollection.replace_one({"chromosome": chromosome}, entry, upsert=True)
+    else:
+        manifestCollection.update({"chromosome": chromosome}, entry, upsert=True)
+
+def resumeChromosomes(chromosomes, states):
+    # Chromosomes still to load, and those of them that may hold rows and
+    # need them removed first: those left half loaded, or every one if the
+    # manifest is empty. A load marks a chromosome LOADING before its first
+    # row, so only a database loaded before the manifest existed has rows
+    # that no manifest entry accounts for.
+    pending = [curChr for curChr in chromosomes if states.get(curChr) != DONE]
+    if not states:
+        return pending, list(pending)
+    halfLoaded = [curChr for curChr in pending if states.get(curChr) == LOADING]
+    return pending, halfLoaded
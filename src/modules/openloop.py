@@ -0,0 +1,159 @@
+import threading, time
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+from result import Result
+from timing import clockNs
+from histogram import LatencyHistogram
+from workload import queryParams, GENES
+from backends import loadBackend
+from loadgen import histogramResult
+
+# Seconds the workers keep draining queued arrivals after the schedule ends;
+# whatever is still queued then is counted as backlog
+DRAIN_TIME = 5
+
+# A step is saturated when fewer than this fraction of its scheduled queries
+# complete, or it completes them at less than this fraction of the offered rate
+SATURATION_THRESHOLD = 0.95
+
+def parseRates(rateSpec):
+    # "qryByGene=2000,qryByClinSig=5" -> {"qryByGene": 2000.0, "qryByClinSig": 5.0}
+    rates = {}
+    for item in rateSpec.split(','):
+        queryType, rate = item.split('=')
+        rates[queryType] = float(rate)
+    return rates
+
+def arrivalSchedule(rates, duration):
+    # Fixed-interval arrivals for each query type over duration seconds,
+    # merged into one list of (offset ns, query type, sequence)
+    schedule = []
+    for queryType, rate in rates.items():
+        interval = 1e9 / rate
+        for sequence in range(int(duration * rate)):
+            schedule.append((int(sequence * interval), queryType, sequence))
+    schedule.sort()
+    return schedule
+
+class OpenLoopWorker:
+    # Runs queued arrivals on its own connection. Latency is taken from the
+    # intended send time, so time spent queued behind a slow backend counts
+    # (coordinated-omission correction); service time is from the actual send.
+    def __init__(self, backend, queryTypes):
+        self.backend = backend
+        self.latency = dict([(queryType, LatencyHistogram()) for queryType in queryTypes])
+        self.service = dict([(queryType, LatencyHistogram()) for queryType in queryTypes])
+        self.sendLag = dict([(queryType, LatencyHistogram()) for queryType in queryTypes])
+        self.backlog = dict([(queryType, 0) for queryType in queryTypes])
+        self.error = None
+
+    def run(self, arrivals, stopNs):
+        while True:
+            item = arrivals.get()
+            if item is None:
+                break
+            intendedNs, queryType, sequence = item
+            if self.error is not None or clockNs() > stopNs:
+                self.backlog[queryType] += 1
+                continue
+            params = queryParams(queryType, gene=GENES[sequence % len(GENES)])
+            sendNs = clockNs()
+            try:
+                self.backend.runQuery(queryType, params)
+            except Exception as e:
+                self.error = e
+                continue
+            doneNs = clockNs()
+            self.latency[queryType].record(doneNs - intendedNs)
+            self.service[queryType].record(doneNs - sendNs)
+            self.sendLag[queryType].record(sendNs - intendedNs)
+
+def runOpenLoop(backendName, args, rates, duration, clients, drainTime=DRAIN_TIME):
+    # Issue queries at the fixed rates in rates ({query type: queries/s}) for
+    # duration seconds over clients connections. Returns the workers and the
+    # elapsed seconds from the first intended send to the last completion.
+    queryTypes = sorted(rates)
+    workers = []
+    for clientId in range(clients):
+        backend = loadBackend(backendName, args)
+        backend.connect()
+        workers.append(OpenLoopWorker(backend, queryTypes))
+
+    arrivals = queue.Queue()
+    schedule = arrivalSchedule(rates, duration)
+    # Start slightly in the future so the first arrivals are not already late
+    startNs = clockNs() + 10000000
+    stopNs = startNs + int((duration + drainTime) * 1e9)
+    threads = [threading.Thread(target=worker.run, args=(arrivals, stopNs)) for worker in workers]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    # Dispatch on schedule regardless of how far behind the workers are
+    for offsetNs, queryType, sequence in schedule:
+        intendedNs = startNs + offsetNs
+        waitNs = intendedNs - clockNs()
+        if waitNs > 0:
+            time.sleep(waitNs / 1e9)
+        arrivals.put((intendedNs, queryType, sequence))
+    for thread in threads:
+        arrivals.put(None)
+    for thread in threads:
+        thread.join()
+    elapsed = (clockNs() - startNs) / 1e9
+
+    for worker in workers:
+        worker.backend.close()
+    for worker in workers:
+        if worker.error is not None:
+            raise worker.error
+    return workers, elapsed
+
+def mergeWorkers(workers, attribute, queryType):
+    merged = LatencyHistogram()
+    for worker in workers:
+        merged.merge(getattr(worker, attribute)[queryType])
+    return merged
+
+def openLoopResult(method, tag, clients, workers, queryTypes, rates, duration, elapsed):
+    # Result row for queryTypes; latency fields are corrected for coordinated omission
+    latency = LatencyHistogram()
+    service = LatencyHistogram()
+    sendLag = LatencyHistogram()
+    backlog = 0
+    for queryType in queryTypes:
+        latency.merge(mergeWorkers(workers, 'latency', queryType))
+        service.merge(mergeWorkers(workers, 'service', queryType))
+        sendLag.merge(mergeWorkers(workers, 'sendLag', queryType))
+        backlog += sum([worker.backlog[queryType] for worker in workers])
+    result = Result()
+    result.method = method
+    result.tag = tag
+    result.clients = clients
+    result.targetRate = sum([rates[queryType] for queryType in queryTypes])
+    histogramResult(result, latency, elapsed)
+    result.backlog = backlog
+    # Queries that queue up and complete during the drain still stretch the
+    # elapsed time, so the achieved rate falls below the offered rate
+    scheduled = sum([int(duration * rates[queryType]) for queryType in queryTypes])
+    result.saturated = latency.count < SATURATION_THRESHOLD * scheduled or result.throughput < SATURATION_THRESHOLD * result.targetRate
+    if service.count > 0:
+        result.serviceTimeP99 = service.percentile(99) / 1e9
+        result.sendLagP99 = sendLag.percentile(99) / 1e9
+    return result, latency
+
+def openLoopResults(method, tag, clients, rates, duration, workers, elapsed):
+    # One result row per query type plus an "all" row over the whole mix;
+    # also returns the corrected latency histogram of each row
+    results = []
+    queryTypes = sorted(rates)
+    for queryType in queryTypes:
+        result, latency = openLoopResult(method, tag, clients, workers, [queryType], rates, duration, elapsed)
+        result.queryType = queryType
+        results.append((result, latency))
+    result, latency = openLoopResult(method, tag, clients, workers, queryTypes, rates, duration, elapsed)
+    result.queryType = "all"
+    results.append((result, latency))
+    return results
@@ -0,0 +1,47 @@
+import multiprocessing
+from snpreader import chromosomeFilePaths, BUFFER_SIZE
+
+def countLines(filePath):
+    # Fast line count used to size key ranges before loading; one extra
+    # line is counted in case the file does not end with a newline
+    lineCount = 1
+    with open(filePath, 'rb') as dataFile:
+        while True:
+            block = dataFile.read(BUFFER_SIZE)
+            if not block:
+                break
+            lineCount += block.count(b'\n')
+    return lineCount
+
+def allocateIdRanges(chromosomes, path, firstId):
+    # Reserve a block of SNP primary keys for each chromosome, sized by the
+    # line count of its SNP file, so concurrent loads never share an id.
+    # Returns {chromosome: first id of its block}.
+    idRanges = {}
+    nextId = firstId
+    for curChr in chromosomes:
+        curSnpFilePath, curLociFilePath = chromosomeFilePaths(path, curChr)
+        idRanges[curChr] = nextId
+        nextId += countLines(curSnpFilePath)
+    return idRanges
+
+def reserveIdRanges(cursor, chromosomes, path):
+    # allocateIdRanges from past the current maximum SNP id
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM snp")
+    return allocateIdRanges(chromosomes, path, cursor.fetchone()[0] + 1)
+
+def loadInParallel(loadJob, chromosomes, jobs):
+    # Run loadJob(chromosome) in a pool of worker processes and yield each
+    # return value as its chromosome finishes. loadJob is pickled by name,
+    # so it must be a module-level function (or a partial of one); it must
+    # open its own database connection.
+    pool = multiprocessing.Pool(jobs)
+    try:
+        for jobResult in pool.imap_unordered(loadJob, chromosomes):
+            yield jobResult
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
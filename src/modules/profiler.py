@@ -0,0 +1,114 @@
+import cProfile, gc
+from sampler import clientRss
+try:
+    import tracemalloc # Python 3.4+
+except ImportError:
+    tracemalloc = None
+
+# Entries in each memory report
+MEMORY_TOP = 25
+
+def objectCounts():
+    # Live gc-tracked objects by type name, for interpreters without tracemalloc
+    counts = {}
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+class NullProfiler:
+    # Stand-in when profiling is off, so phase boundaries cost one empty call
+    def start(self, chromosome, phase):
+        return
+
+    def phase(self, phase):
+        return
+
+    def stop(self):
+        return
+
+class PhaseProfiler:
+    # Profiles each (chromosome, phase) section with cProfile and, with
+    # memory=True, reports the top allocations of the section. At the end of
+    # a section it writes <baseName>[-chr<chr>]-<phase>.pstats and, with
+    # memory, <baseName>[-chr<chr>]-<phase>-memory.txt. A section that
+    # repeats (query runs) accumulates into one profile; its memory report
+    # covers the latest repeat.
+    def __init__(self, baseName, memory=False, top=MEMORY_TOP):
+        self.baseName = baseName
+        self.memory = memory
+        self.top = top
+        self.profiles = {}
+        self.current = None
+        self.chromosome = ''
+        self.memoryStart = None
+        self.rssStart = None
+        if memory and tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def fileName(self, key, suffix):
+        chromosome, phase = key
+        name = self.baseName
+        if chromosome != '':
+            name += '-chr' + chromosome
+        return name + '-' + phase + suffix
+
+    def memorySnapshot(self):
+        if tracemalloc is not None:
+            return tracemalloc.take_snapshot()
+        return objectCounts()
+
+    def writeMemory(self, key):
+        memoryEnd = self.memorySnapshot()
+        rssEnd = clientRss()
+        with open(self.fileName(key, '-memory.txt'), 'w') as memoryFile:
+            memoryFile.write("RSS\t" + str(self.rssStart) + "\t" + str(rssEnd) + "\t" + str(rssEnd - self.rssStart) + "\n")
+            if tracemalloc is not None:
+                memoryFile.write('\t'.join(["Size Change", "Count Change", "Size", "Location"]) + '\n')
+                for stat in memoryEnd.compare_to(self.memoryStart, 'lineno')[:self.top]:
+                    memoryFile.write('\t'.join([str(stat.size_diff), str(stat.count_diff), str(stat.size), str(stat.traceback)]) + '\n')
+                return
+            # Change in live objects by type
+            memoryFile.write('\t'.join(["Type", "Objects", "Change"]) + '\n')
+            changes = [(count - self.memoryStart.get(name, 0), name, count) for name, count in memoryEnd.items()]
+            changes.sort(reverse=True)
+            for change, name, count in changes[:self.top]:
+                memoryFile.write('\t'.join([name, str(count), str(change)]) + '\n')
+
+    def start(self, chromosome, phase):
+        # Begin a section for a chromosome ('' outside a chromosome load)
+        self.stop()
+        self.chromosome = str(chromosome)
+        self.begin(phase)
+
+    def phase(self, phase):
+        # End the current section and begin the next phase of the same chromosome
+        self.stop()
+        self.begin(phase)
+
+    def begin(self, phase):
+        key = (self.chromosome, phase)
+        if key not in self.profiles:
+            self.profiles[key] = cProfile.Profile()
+        self.current = key
+        if self.memory:
+            self.rssStart = clientRss()
+            self.memoryStart = self.memorySnapshot()
+        self.profiles[key].enable()
+
+    def stop(self):
+        if self.current is None:
+            return
+        key = self.current
+        self.current = None
+        self.profiles[key].disable()
+        self.profiles[key].dump_stats(self.fileName(key, '.pstats'))
+        if self.memory:
+            self.writeMemory(key)
+            self.memoryStart = None
+
+def phaseProfiler(enabled, baseName, memory=False):
+    # PhaseProfiler for --profile, otherwise a NullProfiler
+    if enabled:
+        return PhaseProfiler(baseName, memory)
+    return NullProfiler()
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from timing import QueryTimer, clockNs
+
+# Default number of cached query results
+CACHE_ENTRIES = 1024
+
+# Cached query latencies are summarized per outcome: a miss runs the
+# backend query, a hit is a dictionary lookup
+CACHE_OUTCOMES = ['Hit', 'Miss']
+
+def queryKey(queryType, params):
+    # Query type plus its parameters in name order, with surrounding
+    # whitespace removed, so equivalent queries share an entry
+    return (queryType,) + tuple([(name, str(params[name]).strip()) for name in sorted(params)])
+
+class QueryCache:
+    # LRU cache of query results in front of a backend's runQuery, bounded
+    # to maxEntries results. Each entry records the chromosomes its result
+    # was read from, or None if it may depend on any of them (counts, and
+    # lookups that found nothing), so a load only invalidates the entries
+    # it can change.
+    def __init__(self, maxEntries=CACHE_ENTRIES):
+        self.maxEntries = maxEntries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def runQuery(self, backend, queryType, params):
+        key = queryKey(queryType, params)
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            # Reinserted as the most recently used
+            self.entries[key] = entry
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        rows = backend.runQuery(queryType, params)
+        self.entries[key] = (rows, backend.resultChromosomes(queryType, params, rows))
+        if len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return rows
+
+    def invalidate(self, chromosome):
+        # Drop every entry a commit of new data for chromosome may change
+        for key, (rows, chromosomes) in list(self.entries.items()):
+            if chromosomes is None or chromosome in chromosomes:
+                del self.entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def counts(self):
+        return self.hits, self.misses, self.evictions, self.invalidations
+
+def outcomeTimers():
+    # {outcome: QueryTimer} for timeCachedQuery
+    return dict([(outcome, QueryTimer()) for outcome in CACHE_OUTCOMES])
+
+def timeCachedQuery(queryCache, timers, backend, queryType, params):
+    # Run one query through the cache and return the elapsed time in
+    # seconds. Unless timers is None (warmup), the time is recorded under
+    # the outcome, so priming misses are not pooled with hits.
+    hits = queryCache.hits
+    queryStart = clockNs()
+    queryCache.runQuery(backend, queryType, params)
+    elapsed = clockNs() - queryStart
+    if timers is not None:
+        timers['Hit' if queryCache.hits > hits else 'Miss'].record(queryType, elapsed)
+    return elapsed / 1e9
+
+def applyCacheCounts(result, before, after):
+    # Hits, misses, hit rate, evictions and invalidations between two
+    # counts() snapshots
+    result.cacheHits = after[0] - before[0]
+    result.cacheMisses = after[1] - before[1]
+    result.cacheEvictions = after[2] - before[2]
+    result.cacheInvalidations = after[3] - before[3]
+    lookups = result.cacheHits + result.cacheMisses
+    if lookups > 0:
+        result.cacheHitRate = float(result.cacheHits) / lookups
@@ -0,0 +1,187 @@
+import json, threading, time
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+try:
+    from urllib2 import Request, urlopen
+except ImportError:
+    from urllib.request import Request, urlopen
+
+# Rows sent per batch, and the longest a row waits before its batch is sent
+REPORT_BATCH = 50
+REPORT_INTERVAL = 5.0
+
+# Attempts per batch, with the wait doubling from REPORT_BACKOFF seconds up
+# to REPORT_MAX_BACKOFF between attempts
+REPORT_RETRIES = 5
+REPORT_BACKOFF = 1.0
+REPORT_MAX_BACKOFF = 30.0
+
+# Seconds before an HTTP report request is abandoned
+HTTP_TIMEOUT = 10
+
+class GSpreadTarget:
+    # New worksheet in a Google spreadsheet, one row per result. Logs in
+    # once, and again only after a failed send.
+    def __init__(self, docKey, tag, username, password):
+        self.docKey = docKey
+        self.tag = tag
+        self.username = username
+        self.password = password
+        self.needsLogin = True
+
+    def describe(self):
+        return "GDocs"
+
+    def open(self, header):
+        import gspread # https://pypi.python.org/pypi/gspread/ (v0.1.0)
+        self.client = gspread.Client(auth=(self.username, self.password))
+        self.client.login()
+        self.needsLogin = False
+        self.worksheet = self.client.open_by_key(self.docKey).add_worksheet(self.tag + "-" + str(time.time()), 1, 1)
+        self.worksheet.append_row(header)
+
+    def send(self, rows):
+        # Rows are appended one at a time, so a retry resumes at the row that failed
+        try:
+            if self.needsLogin:
+                self.client.login()
+                self.needsLogin = False
+            while rows:
+                self.worksheet.append_row(rows[0])
+                del rows[0]
+        except:
+            self.needsLogin = True
+            raise
+
+class FileTarget:
+    # Tab separated rows appended to a local file, e.g. as a stand-in for
+    # the spreadsheet
+    def __init__(self, filePath):
+        self.filePath = filePath
+
+    def describe(self):
+        return self.filePath
+
+    def open(self, header):
+        with open(self.filePath, 'a') as reportFile:
+            reportFile.write('\t'.join(header) + '\n')
+
+    def send(self, rows):
+        with open(self.filePath, 'a') as reportFile:
+            reportFile.write(''.join(['\t'.join(row) + '\n' for row in rows]))
+        del rows[:]
+
+class HttpTarget:
+    # POSTs each batch as {"header": [...], "rows": [[...], ...]}
+    def __init__(self, url):
+        self.url = url
+
+    def describe(self):
+        return self.url
+
+    def open(self, header):
+        self.header = header
+
+    def send(self, rows):
+        body = json.dumps({"header": self.header, "rows": rows}).encode('utf-8')
+        request = Request(self.url, body, {"Content-Type": "application/json"})
+        urlopen(request, timeout=HTTP_TIMEOUT).close()
+        del rows[:]
+
+def reportTarget(spec):
+    # Target for a --report entry: file:PATH or an http(s):// URL
+    if spec.startswith('file:'):
+        return FileTarget(spec[len('file:'):])
+    if spec.startswith('http://') or spec.startswith('https://'):
+        return HttpTarget(spec)
+    raise ValueError("Unknown report target " + spec + "; expected file:PATH or an http(s):// URL")
+
+class Reporter:
+    # Queues result rows for one target and sends them in batches from a
+    # background thread. A failed batch is retried with exponential backoff
+    # while new rows keep queueing, so a slow or unreachable target never
+    # delays the next measurement. Once a batch has used up its attempts the
+    # target is given up on and later rows are dropped, so close() waits for
+    # at most one batch's retries.
+    def __init__(self, target, header):
+        self.target = target
+        self.header = header
+        self.opened = False
+        self.failed = False
+        self.dropped = 0
+        self.queue = queue.Queue()
+        self.errors = []
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def write(self, result):
+        self.queue.put(result.stringArr())
+
+    def deliver(self, rows):
+        # Send one batch, retrying until it is delivered or attempts run out
+        backoff = REPORT_BACKOFF
+        for attempt in range(1, REPORT_RETRIES + 1):
+            try:
+                if not self.opened:
+                    self.target.open(self.header)
+                    self.opened = True
+                self.target.send(rows)
+                return
+            except Exception as e:
+                error = e
+                if attempt < REPORT_RETRIES:
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, REPORT_MAX_BACKOFF)
+        self.errors.append("Unable to send " + str(len(rows)) + " results to " + self.target.describe() + ": " + str(error))
+        self.failed = True
+
+    def run(self):
+        done = False
+        while not done:
+            rows = []
+            deadline = time.time() + REPORT_INTERVAL
+            while len(rows) < REPORT_BATCH:
+                try:
+                    row = self.queue.get(timeout=max(deadline - time.time(), 0.01))
+                except queue.Empty:
+                    break
+                if row is None:
+                    done = True
+                    break
+                rows.append(row)
+            if rows and self.failed:
+                self.dropped += len(rows)
+            elif rows:
+                self.deliver(rows)
+
+    def close(self):
+        # Send everything queued so far, return a message per dropped batch
+        # (and one for the rows dropped after the target failed)
+        self.queue.put(None)
+        self.thread.join()
+        if self.dropped:
+            self.errors.append("Dropped " + str(self.dropped) + " later results for " + self.target.describe() + " after it failed")
+        return self.errors
+
+class Reporters:
+    # Fans results out to a Reporter per target; without targets write()
+    # does nothing
+    def __init__(self, header):
+        self.header = header
+        self.reporters = []
+
+    def add(self, target):
+        self.reporters.append(Reporter(target, self.header))
+
+    def write(self, result):
+        for reporter in self.reporters:
+            reporter.write(result)
+
+    def close(self):
+        errors = []
+        for reporter in self.reporters:
+            errors.extend(reporter.close())
+        return errors
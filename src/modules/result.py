@@ -1,109 +1,178 @@
-class Result:
-    chromosome = ''
-    method = ''
-    tag = ''
-    
-    snpLoadStart = '-'
-    snpLoadEnd = '-'
-    snpLoadTime = '-'
-    totalSnps = '-'
-    lociLoadStart = '-'
-    lociLoadEnd = '-'
-    lociLoadTime = '-'
-    totalLoci = '-'
-    snpInsertStart = '-'
-    snpInsertEnd = '-'
-    snpInsertTime = '-'
-    lociInsertStart = '-'
-    lociInsertEnd = '-'
-    lociInsertTime = '-'
-    mysqlTotalTime = '-'
-    documentInsertStart = '-'
-    documentInsertEnd = '-'
-    documentInsertTime = '-'
-    totalDocuments = '-'
-    
-    idxRsid = '-'
-    idxClinSig = '-'
-    idxGene = '-'
-    
-    qryByRsid = '-'
-    qryByClinSig = '-'
-    qryByGene = '-'
-    qryByGeneSig = '-'
-    
+# Result schema: (attribute, column header, type), in output order.
+# Unset fields are None and are written as '-' in the text results file.
+FIELDS = [
+    ("chromosome", "Chromosome", str),
+    ("method", "Method", str),
+    ("tag", "Tag", str),
+    ("snpLoadStart", "SNP Load Start", float),
+    ("snpLoadEnd", "SNP Load End", float),
+    ("snpLoadTime", "SNP Load Time", float),
+    ("lociLoadStart", "Loci Load Start", float),
+    ("lociLoadEnd", "Loci Load End", float),
+    ("lociLoadTime", "Loci Load Time", float),
+    ("snpInsertStart", "SNP Insert Start", float),
+    ("snpInsertEnd", "SNP Insert End", float),
+    ("snpInsertTime", "SNP Insert Time", float),
+    ("totalSnps", "Total SNPs", int),
+    ("lociInsertStart", "Loci Insert Start", float),
+    ("lociInsertEnd", "Loci Insert End", float),
+    ("lociInsertTime", "Loci Insert Time", float),
+    ("totalLoci", "Total Loci", int),
+    ("mysqlTotalTime", "Total MySQL/pgsql Time", float),
+    ("documentInsertStart", "Document Insert Start", float),
+    ("documentInsertEnd", "Document Insert End", float),
+    ("documentInsertTime", "Document Insert Time", float),
+    ("totalDocuments", "Total Documents", int),
+    ("idxRsid", "Idx-RSID", float),
+    ("idxClinSig", "Idx-ClinSig", float),
+    ("idxGene", "Idx-Gene", float),
+    ("qryByRsid", "Qry-RSID", float),
+    ("qryByClinSig", "Qry-ClinSig", float),
+    ("qryByGene", "Qry-Gene", float),
+    ("qryByGeneSig", "Qry-Gene/Sig", float),
+    ("snpInsertRate", "SNP Insert Rows/s", float),
+    ("lociInsertRate", "Loci Insert Rows/s", float),
+    ("documentInsertRate", "Document Insert Docs/s", float),
+    ("totalBatches", "Total Batches", int),
+    ("batchLatencyMean", "Batch Latency Mean", float),
+    ("batchLatencyMax", "Batch Latency Max", float),
+    ("wallTime", "Wall Time", float),
+    ("clients", "Clients", int),
+    ("queryType", "Query Type", str),
+    ("queryCount", "Query Count", int),
+    ("throughput", "Throughput QPS", float),
+    ("latencyMean", "Latency Mean", float),
+    ("latencyP50", "Latency p50", float),
+    ("latencyP95", "Latency p95", float),
+    ("latencyP99", "Latency p99", float),
+    ("latencyP999", "Latency p99.9", float),
+    ("latencyMax", "Latency Max", float),
+    ("targetRate", "Target QPS", float),
+    ("backlog", "Backlog", int),
+    ("saturated", "Saturated", bool),
+    ("sendLagP99", "Send Lag p99", float),
+    ("serviceTimeP99", "Service Time p99", float),
+    ("clientCpuTime", "Client CPU Time", float),
+    ("clientCpuPercent", "Client CPU %", float),
+    ("peakRss", "Peak RSS", int),
+    ("diskReadBytes", "Disk Read Bytes", int),
+    ("diskWriteBytes", "Disk Write Bytes", int),
+    ("serverCpuTime", "Server CPU Time", float),
+    ("deltaInserts", "Delta Inserts", int),
+    ("deltaUpdates", "Delta Updates", int),
+    ("deltaDeletes", "Delta Deletes", int),
+    ("deltaCompareTime", "Delta Compare Time", float),
+    ("deltaInsertTime", "Delta Insert Time", float),
+    ("deltaUpdateTime", "Delta Update Time", float),
+    ("deltaDeleteTime", "Delta Delete Time", float),
+    ("idxRsidBytes", "Idx-RSID Bytes", int),
+    ("idxClinSigBytes", "Idx-ClinSig Bytes", int),
+    ("idxGeneBytes", "Idx-Gene Bytes", int),
+    ("bitmapBuildTime", "Bitmap Build Time", float),
+    ("bitmapBytes", "Bitmap Bytes", int),
+    ("cacheHits", "Cache Hits", int),
+    ("cacheMisses", "Cache Misses", int),
+    ("cacheHitRate", "Cache Hit Rate", float),
+    ("lookupCount", "Lookup RSIDs", int),
+    ("lookupFound", "Lookup Found", int),
+    ("lookupRows", "Lookup Rows", int),
+    ("lookupFirstRow", "Lookup First Row", float),
+    ("lookupTime", "Lookup Time", float),
+    ("lookupRate", "Lookup RSIDs/s", float),
+    ("idxFull", "Idx-Full", float),
+    ("idxFullBytes", "Idx-Full Bytes", int),
+    ("qryByGeneClassSig", "Qry-Gene/Class/Sig", float),
+    ("cacheEvictions", "Cache Evictions", int),
+    ("cacheInvalidations", "Cache Invalidations", int),
+]
+
+FIELD_NAMES = [field[0] for field in FIELDS]
+
+def textValue(value):
+    if value is None:
+        return '-'
+    return str(value)
+
+class Result(object):
+    __slots__ = FIELD_NAMES
+
     def __init__(self):
-        return
-    
+        for name in FIELD_NAMES:
+            setattr(self, name, None)
+        self.chromosome = ''
+        self.method = ''
+        self.tag = ''
+
+    # Slotted objects carry no __dict__, so pickle (used to return results
+    # from parallel load jobs) needs the state spelled out
+    def __getstate__(self):
+        return [getattr(self, name) for name in FIELD_NAMES]
+
+    def __setstate__(self, state):
+        for name, value in zip(FIELD_NAMES, state):
+            setattr(self, name, value)
+
     def headerArr(self):
-        return ["Chromosome", "Method", "Tag", 
-                         "SNP Load Start", "SNP Load End", "SNP Load Time", 
-                         "Loci Load Start", "Loci Load End", "Loci Load Time",
-                         "SNP Insert Start", "SNP Insert End", "SNP Insert Time", "Total SNPs",
-                         "Loci Insert Start", "Loci Insert End", "Loci Insert Time", "Total Loci",
-                         "Total MySQL/pgsql Time",
-                         "Document Insert Start", "Document Insert End", "Document Insert Time", "Total Documents",
-                         "Idx-RSID", "Idx-ClinSig", "Idx-Gene", 
-                         "Qry-RSID", "Qry-ClinSig", "Qry-Gene", "Qry-Gene/Sig"]
-    
+        return [field[1] for field in FIELDS]
+
     def stringArr(self):
         self.calculate()
-        return [self.chromosome, self.method, self.tag, 
-                                 str(self.snpLoadStart), str(self.snpLoadEnd), str(self.snpLoadTime),
-                                 str(self.lociLoadStart), str(self.lociLoadEnd), str(self.lociLoadTime),
-                                 str(self.snpInsertStart), str(self.snpInsertEnd), str(self.snpInsertTime), str(self.totalSnps),
-                                 str(self.lociInsertStart), str(self.lociInsertEnd), str(self.lociInsertTime), str(self.totalLoci),
-                                 str(self.mysqlTotalTime),
-                                 str(self.documentInsertStart), str(self.documentInsertEnd), str(self.documentInsertTime), str(self.totalDocuments),
-                                 str(self.idxRsid), str(self.idxClinSig), str(self.idxGene),
-                                 str(self.qryByRsid), str(self.qryByClinSig), str(self.qryByGene), str(self.qryByGeneSig)]        
-    
+        return [textValue(getattr(self, name)) for name in FIELD_NAMES]
+
     def toString(self):
-        self.calculate()
-        return '\t'.join([self.chromosome, self.method, self.tag, 
-                         str(self.snpLoadStart), str(self.snpLoadEnd), str(self.snpLoadTime),
-                         str(self.lociLoadStart), str(self.lociLoadEnd), str(self.lociLoadTime),
-                         str(self.snpInsertStart), str(self.snpInsertEnd), str(self.snpInsertTime), str(self.totalSnps),
-                         str(self.lociInsertStart), str(self.lociInsertEnd), str(self.lociInsertTime), str(self.totalLoci),
-                         str(self.mysqlTotalTime),
-                         str(self.documentInsertStart), str(self.documentInsertEnd), str(self.documentInsertTime), str(self.totalDocuments),
-                         str(self.idxRsid), str(self.idxClinSig), str(self.idxGene),
-                         str(self.qryByRsid), str(self.qryByClinSig), str(self.qryByGene), str(self.qryByGeneSig)])
-    
+        return '\t'.join(self.stringArr())
+
     def toHeader(self):
-        return '\t'.join(["Chromosome", "Method", "Tag", 
-                         "SNP Load Start", "SNP Load End", "SNP Load Time", 
-                         "Loci Load Start", "Loci Load End", "Loci Load Time",
-                         "SNP Insert Start", "SNP Insert End", "SNP Insert Time", "Total SNPs",
-                         "Loci Insert Start", "Loci Insert End", "Loci Insert Time", "Total Loci",
-                         "Total MySQL/pgsql Time",
-                         "Document Insert Start", "Document Insert End", "Document Insert Time", "Total Documents",
-                         "Idx-RSID", "Idx-ClinSig", "Idx-Gene", 
-                         "Qry-RSID", "Qry-ClinSig", "Qry-Gene", "Qry-Gene/Sig"])    
+        return '\t'.join(self.headerArr())
+
+    def toDict(self):
+        # Typed values keyed by attribute name; unset fields are None
+        self.calculate()
+        values = {}
+        for name, header, fieldType in FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                value = fieldType(value)
+            values[name] = value
+        return values
+
     def toTerm(self):
         self.calculate()
-        return '\n'.join(["Chromosome: " + str(self.chromosome),
-                         "\tMethod: " + str(self.method) + ", Tag: " + str(self.tag),
-                         "\tSNP Load Time: " + str(self.snpLoadTime) + 's',
-                         "\tLoci Load Time: " + str(self.lociLoadTime) + 's',
-                         "\tSNP Insert Time: " + str(self.snpInsertTime) + 's',
-                         "\t\tTotal SNPs: " + str(self.totalSnps),
-                         "\tLoci Insert Time: " + str(self.lociInsertTime) + 's',
-                         "\t\tTotal Loci: " + str(self.totalLoci),
-                         "\tMySQL/pgsql Total Time: " + str(self.mysqlTotalTime) + 's',
-                         "\tDocument Insert Time: " + str(self.documentInsertTime) + 's',
-                         "\t\tTotal Documents: " + str(self.totalDocuments)])
-    
+        lines = ["Chromosome: " + str(self.chromosome),
+                 "\tMethod: " + str(self.method) + ", Tag: " + str(self.tag),
+                 "\tSNP Load Time: " + textValue(self.snpLoadTime) + 's',
+                 "\tLoci Load Time: " + textValue(self.lociLoadTime) + 's',
+                 "\tSNP Insert Time: " + textValue(self.snpInsertTime) + 's',
+                 "\t\tTotal SNPs: " + textValue(self.totalSnps) + ", Rows/s: " + textValue(self.snpInsertRate),
+                 "\tLoci Insert Time: " + textValue(self.lociInsertTime) + 's',
+                 "\t\tTotal Loci: " + textValue(self.totalLoci) + ", Rows/s: " + textValue(self.lociInsertRate),
+                 "\tMySQL/pgsql Total Time: " + textValue(self.mysqlTotalTime) + 's',
+                 "\tDocument Insert Time: " + textValue(self.documentInsertTime) + 's',
+                 "\t\tTotal Documents: " + textValue(self.totalDocuments) + ", Docs/s: " + textValue(self.documentInsertRate),
+                 "\t\tTotal Batches: " + textValue(self.totalBatches) + ", Mean: " + textValue(self.batchLatencyMean) + "s, Max: " + textValue(self.batchLatencyMax) + 's']
+        if self.deltaInserts is not None:
+            lines.extend(["\tDelta Compare Time: " + textValue(self.deltaCompareTime) + 's',
+                          "\t\tInserts: " + textValue(self.deltaInserts) + " in " + textValue(self.deltaInsertTime) + "s, Updates: " + textValue(self.deltaUpdates) + " in " + textValue(self.deltaUpdateTime) + "s, Deletes: " + textValue(self.deltaDeletes) + " in " + textValue(self.deltaDeleteTime) + 's'])
+        return '\n'.join(lines)
+
     def calculate(self):
-        if self.snpLoadEnd != '-':
+        if self.snpLoadEnd is not None:
             self.snpLoadTime = self.snpLoadEnd-self.snpLoadStart
-        if self.lociLoadEnd != '-':        
+        if self.lociLoadEnd is not None:
             self.lociLoadTime = self.lociLoadEnd-self.lociLoadStart
-        if self.snpInsertEnd != '-':
+        if self.snpInsertEnd is not None:
             self.snpInsertTime = self.snpInsertEnd-self.snpInsertStart
-        if self.lociInsertEnd != '-':
+        if self.lociInsertEnd is not None:
             self.lociInsertTime = self.lociInsertEnd-self.lociInsertStart
-        if self.lociInsertTime != '-' and self.snpInsertTime != '-':
+        if self.lociInsertTime is not None and self.snpInsertTime is not None:
             self.mysqlTotalTime = self.lociInsertTime+self.snpInsertTime
-        if self.documentInsertEnd != '-':
-            self.documentInsertTime = self.documentInsertEnd-self.documentInsertStart        
\ No newline at end of file
+        if self.snpInsertTime is not None and self.totalSnps is not None and self.snpInsertTime > 0:
+            self.snpInsertRate = self.totalSnps/self.snpInsertTime
+        if self.lociInsertTime is not None and self.totalLoci is not None and self.lociInsertTime > 0:
+            self.lociInsertRate = self.totalLoci/self.lociInsertTime
+        if self.documentInsertEnd is not None:
+            self.documentInsertTime = self.documentInsertEnd-self.documentInsertStart
+        if self.documentInsertTime is not None and self.totalDocuments is not None and self.documentInsertTime > 0:
+            self.documentInsertRate = self.totalDocuments/self.documentInsertTime
+        if self.lookupTime is not None and self.lookupCount is not None and self.lookupTime > 0:
+            self.lookupRate = self.lookupCount/self.lookupTime
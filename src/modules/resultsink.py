@@ -0,0 +1,114 @@
+import csv, json, platform, socket, threading, time
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+from result import FIELD_NAMES
+
+# Records written per flush, and the longest a record waits before a flush
+FLUSH_RECORDS = 500
+FLUSH_INTERVAL = 2.0
+
+# Run description columns added ahead of the result fields in every record
+RUN_FIELDS = ["backend", "scriptVersion", "host", "platform", "python", "options"]
+
+def runInfo(backend, scriptVersion, args):
+    # Backend, script version, machine and command line options for a run
+    options = dict([(name, value) for name, value in vars(args).items() if name not in ('password', 'rkey')])
+    return {"backend": backend,
+            "scriptVersion": scriptVersion,
+            "host": socket.gethostname(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "options": json.dumps(options, sort_keys=True)}
+
+class ResultSink:
+    # Collects result records and writes them from a background thread in
+    # batches, so a slow disk never stalls a timed load or query loop
+    fileMode = 'w'
+
+    def __init__(self, filePath, info):
+        self.filePath = filePath
+        self.info = info
+        self.queue = queue.Queue()
+        self.errors = []
+        self.outFile = open(filePath, self.fileMode)
+        self.writeHeader()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def write(self, result):
+        record = dict(self.info)
+        record.update(result.toDict())
+        self.queue.put(record)
+
+    def run(self):
+        done = False
+        while not done:
+            records = []
+            deadline = time.time() + FLUSH_INTERVAL
+            while len(records) < FLUSH_RECORDS:
+                try:
+                    record = self.queue.get(timeout=max(deadline - time.time(), 0.01))
+                except queue.Empty:
+                    break
+                if record is None:
+                    done = True
+                    break
+                records.append(record)
+            if records:
+                try:
+                    self.writeRecords(records)
+                    self.outFile.flush()
+                except Exception as e:
+                    self.errors.append(e)
+
+    def close(self):
+        # Flush everything queued so far, then re-raise the first write error
+        self.queue.put(None)
+        self.thread.join()
+        self.outFile.close()
+        if self.errors:
+            raise self.errors[0]
+
+    def writeHeader(self):
+        return
+
+    def writeRecords(self, records):
+        raise NotImplementedError
+
+class JsonLinesSink(ResultSink):
+    # One JSON object per line; unset fields are null
+    def writeRecords(self, records):
+        self.outFile.write(''.join([json.dumps(record, sort_keys=True) + '\n' for record in records]))
+
+class CsvSink(ResultSink):
+    # Header row of attribute names; unset fields are empty
+    fileMode = 'wb'
+
+    def writeHeader(self):
+        self.writer = csv.writer(self.outFile)
+        self.writer.writerow(RUN_FIELDS + FIELD_NAMES)
+
+    def writeRecords(self, records):
+        self.writer.writerows([[record[name] for name in RUN_FIELDS + FIELD_NAMES] for record in records])
+
+SINKS = {"jsonl": JsonLinesSink, "csv": CsvSink}
+
+class ResultSinks:
+    # Fans results out to every sink chosen with --format
+    def __init__(self, formats, baseName, info):
+        self.sinks = []
+        for sinkFormat in formats:
+            if sinkFormat not in SINKS:
+                raise ValueError("Unknown results format " + sinkFormat + "; expected one of " + ', '.join(sorted(SINKS)))
+            self.sinks.append(SINKS[sinkFormat](baseName + '.' + sinkFormat, info))
+
+    def write(self, result):
+        for sink in self.sinks:
+            sink.write(result)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
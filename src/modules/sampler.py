@@ -0,0 +1,206 @@
+import os, threading, time
+try:
+    import psutil # https://pypi.python.org/pypi/psutil (optional)
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Seconds between samples
+SAMPLE_INTERVAL = 1.0
+
+def clientCpuTime():
+    # User + system CPU seconds of this process
+    times = os.times()
+    return times[0] + times[1]
+
+def clientRss():
+    # Resident set size of this process in bytes
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError):
+        # Lifetime peak; Linux reports kilobytes
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def wholeDisks():
+    # Block devices that are not partitions, so diskstats is not double counted
+    try:
+        return set(os.listdir('/sys/block'))
+    except OSError:
+        return None
+
+def diskBytes(disks):
+    # System-wide (read bytes, write bytes); on a local database server this
+    # includes the server's own I/O
+    if psutil is not None:
+        counters = psutil.disk_io_counters()
+        if counters is not None:
+            return counters.read_bytes, counters.write_bytes
+    readBytes = 0
+    writeBytes = 0
+    try:
+        with open('/proc/diskstats') as diskstats:
+            for line in diskstats:
+                fields = line.split()
+                if len(fields) < 10 or fields[2].startswith(('loop', 'ram')):
+                    continue
+                if disks is not None and fields[2] not in disks:
+                    continue
+                readBytes += int(fields[5]) * 512
+                writeBytes += int(fields[9]) * 512
+    except (IOError, OSError):
+        return None, None
+    return readBytes, writeBytes
+
+def serverCpuTimes(processName):
+    # {pid: user + system CPU seconds} for every process named processName
+    # (postgres runs one process per connection)
+    cpuTimes = {}
+    if processName is None:
+        return cpuTimes
+    if psutil is not None:
+        for process in psutil.process_iter():
+            try:
+                if process.name() == processName:
+                    times = process.cpu_times()
+                    cpuTimes[process.pid] = times.user + times.system
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return cpuTimes
+    ticks = float(os.sysconf('SC_CLK_TCK'))
+    try:
+        pids = [pid for pid in os.listdir('/proc') if pid.isdigit()]
+    except OSError:
+        return cpuTimes
+    for pid in pids:
+        try:
+            with open('/proc/' + pid + '/stat') as stat:
+                data = stat.read()
+        except (IOError, OSError):
+            continue
+        # The command name is in parentheses and may contain spaces
+        name = data[data.index('(') + 1:data.rindex(')')]
+        if name != processName:
+            continue
+        fields = data[data.rindex(')') + 2:].split()
+        cpuTimes[int(pid)] = (int(fields[11]) + int(fields[12])) / ticks
+    return cpuTimes
+
+class ResourceSummary:
+    # Resource use over one measured section
+    def __init__(self):
+        self.elapsed = 0
+        self.cpuTime = 0
+        self.peakRss = 0
+        self.readBytes = None
+        self.writeBytes = None
+        self.serverCpuTime = None
+
+    def apply(self, result):
+        result.clientCpuTime = self.cpuTime
+        if self.elapsed > 0:
+            result.clientCpuPercent = 100.0 * self.cpuTime / self.elapsed
+        result.peakRss = self.peakRss
+        result.diskReadBytes = self.readBytes
+        result.diskWriteBytes = self.writeBytes
+        result.serverCpuTime = self.serverCpuTime
+        return result
+
+class ResourceSampler:
+    # Samples client CPU, RSS, disk bytes and database server CPU every
+    # interval seconds on a background thread. start()/stop() bracket a
+    # measured section (a result row), phase() labels the samples within it
+    # and each sample is written to timeSeriesFile if one is given.
+    def __init__(self, interval=SAMPLE_INTERVAL, serverProcess=None, timeSeriesFile=None):
+        self.interval = interval
+        self.serverProcess = serverProcess
+        self.timeSeriesFile = timeSeriesFile
+        self.disks = wholeDisks()
+        self.lock = threading.Lock()
+        self.stopEvent = threading.Event()
+        self.running = False
+        self.currentPhase = ''
+        self.previous = None
+        self.summary = None
+        if timeSeriesFile is not None:
+            timeSeriesFile.write('\t'.join(["Time", "Phase", "RSS", "Client CPU %", "Disk Read B/s", "Disk Write B/s", "Server CPU %"]) + '\n')
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def snapshot(self):
+        readBytes, writeBytes = diskBytes(self.disks)
+        return {"time": time.time(), "cpu": clientCpuTime(), "rss": clientRss(),
+                "read": readBytes, "write": writeBytes, "server": serverCpuTimes(self.serverProcess)}
+
+    def sample(self):
+        # Take a sample and add its deltas since the previous one to the
+        # current summary
+        current = self.snapshot()
+        with self.lock:
+            previous = self.previous
+            self.previous = current
+            if previous is None or self.summary is None:
+                return
+            summary = self.summary
+            elapsed = current["time"] - previous["time"]
+            summary.elapsed += elapsed
+            summary.cpuTime += current["cpu"] - previous["cpu"]
+            summary.peakRss = max(summary.peakRss, current["rss"])
+            readRate = writeRate = None
+            if current["read"] is not None and previous["read"] is not None:
+                summary.readBytes = (summary.readBytes or 0) + current["read"] - previous["read"]
+                summary.writeBytes = (summary.writeBytes or 0) + current["write"] - previous["write"]
+                if elapsed > 0:
+                    readRate = (current["read"] - previous["read"]) / elapsed
+                    writeRate = (current["write"] - previous["write"]) / elapsed
+            serverCpu = None
+            if self.serverProcess is not None:
+                # Per process deltas; processes that exit drop out, new ones
+                # count from zero
+                serverCpu = sum([max(0, cpu - previous["server"].get(pid, 0)) for pid, cpu in current["server"].items()])
+                summary.serverCpuTime = (summary.serverCpuTime or 0) + serverCpu
+            if self.timeSeriesFile is not None and elapsed > 0:
+                self.timeSeriesFile.write('\t'.join([str(current["time"]), self.currentPhase, str(current["rss"]),
+                                                     str(100.0 * (current["cpu"] - previous["cpu"]) / elapsed),
+                                                     str(readRate), str(writeRate),
+                                                     str(None if serverCpu is None else 100.0 * serverCpu / elapsed)]) + '\n')
+
+    def run(self):
+        while not self.stopEvent.wait(self.interval):
+            if self.running:
+                self.sample()
+
+    def start(self, phase):
+        # Begin a measured section
+        with self.lock:
+            self.currentPhase = phase
+            self.summary = ResourceSummary()
+            self.previous = None
+        self.sample()
+        self.summary.peakRss = self.previous["rss"]
+        self.running = True
+
+    def phase(self, phase):
+        # Label the samples that follow; the boundary sample closes the
+        # previous phase
+        self.sample()
+        self.currentPhase = phase
+
+    def stop(self):
+        # End the measured section and return its ResourceSummary
+        self.running = False
+        self.sample()
+        with self.lock:
+            summary = self.summary
+            self.summary = None
+        return summary
+
+    def close(self):
+        self.stopEvent.set()
+        self.thread.join()
@@ -0,0 +1,110 @@
+import sys
+from array import array
+
+class Bitmap:
+    # Uncompressed bitmap over SNP ordinals that keeps its cardinality as
+    # bits are set and cleared
+    def __init__(self):
+        self.bits = bytearray()
+        self.count = 0
+
+    def set(self, ordinal):
+        byte = ordinal >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytearray(byte - len(self.bits) + 1))
+        mask = 1 << (ordinal & 7)
+        if not self.bits[byte] & mask:
+            self.bits[byte] |= mask
+            self.count += 1
+
+    def clear(self, ordinal):
+        byte = ordinal >> 3
+        mask = 1 << (ordinal & 7)
+        if byte < len(self.bits) and self.bits[byte] & mask:
+            self.bits[byte] &= ~mask & 0xff
+            self.count -= 1
+
+    def test(self, ordinal):
+        byte = ordinal >> 3
+        return byte < len(self.bits) and self.bits[byte] & (1 << (ordinal & 7)) != 0
+
+class SnpIndex:
+    # In-process query engine over the SNP/loci data. Each SNP gets the next
+    # ordinal and a compact record (rsid, chr, has_sig, loci), with loci as
+    # (mrna_acc, gene, class) tuples. A hash index maps rsid to ordinal, an
+    # inverted index maps each gene to an ascending array of the ordinals
+    # with a locus on it and a bitmap holds has_sig. Ordinals only grow, so
+    # appends keep the gene arrays sorted; a removed SNP leaves a None
+    # record behind.
+    def __init__(self):
+        self.ordinals = {}
+        self.records = []
+        self.genes = {}
+        self.hasSig = Bitmap()
+        # Load manifest, {chromosome: state}
+        self.states = {}
+
+    def addSnp(self, rsid, chromosome, hasSig, loci):
+        # Strings are interned so repeated chromosome, gene and class values
+        # share one object
+        ordinal = len(self.records)
+        loci = tuple([(mrnaAcc, intern(gene), intern(locusClass)) for mrnaAcc, gene, locusClass in loci])
+        self.records.append((rsid, intern(chromosome), hasSig, loci))
+        self.ordinals[rsid] = ordinal
+        if hasSig:
+            self.hasSig.set(ordinal)
+        for gene in set([locus[1] for locus in loci]):
+            if gene not in self.genes:
+                self.genes[gene] = array('l')
+            self.genes[gene].append(ordinal)
+        return ordinal
+
+    def removeSnp(self, rsid):
+        ordinal = self.ordinals.pop(rsid, None)
+        if ordinal is None:
+            return
+        loci = self.records[ordinal][3]
+        self.records[ordinal] = None
+        self.hasSig.clear(ordinal)
+        for gene in set([locus[1] for locus in loci]):
+            self.genes[gene].remove(ordinal)
+
+    def removeChromosome(self, chromosome):
+        for record in self.records:
+            if record is not None and record[1] == chromosome:
+                self.removeSnp(record[0])
+
+    def snpRows(self, rsid):
+        # One (rsid, chr, has_sig, mrna_acc, gene, class) row per locus, as
+        # the SQL join returns them
+        ordinal = self.ordinals.get(rsid)
+        if ordinal is None:
+            return []
+        rsid, chromosome, hasSig, loci = self.records[ordinal]
+        return [(rsid, chromosome, hasSig) + locus for locus in loci]
+
+    def lookupRows(self, rsid):
+        # snpRows, or one row with no locus for a SNP without loci, as the
+        # batch lookup's LEFT JOIN returns them
+        rows = self.snpRows(rsid)
+        ordinal = self.ordinals.get(rsid)
+        if rows or ordinal is None:
+            return rows
+        rsid, chromosome, hasSig, loci = self.records[ordinal]
+        return [(rsid, chromosome, hasSig, None, None, None)]
+
+    def countSig(self):
+        return self.hasSig.count
+
+    def countGene(self, gene):
+        return len(self.genes.get(gene, ()))
+
+    def countGeneSig(self, gene):
+        test = self.hasSig.test
+        return sum([1 for ordinal in self.genes.get(gene, ()) if test(ordinal)])
+
+    def indexSizes(self):
+        # Bytes of the rsid hash table (keys are shared with the records),
+        # the has_sig bitmap and the gene table with its ordinal arrays
+        geneBytes = sys.getsizeof(self.genes) + sum([ordinals.itemsize * len(ordinals) for ordinals in self.genes.values()])
+        return [sys.getsizeof(self.ordinals), len(self.hasSig.bits), geneBytes]
@@ -0,0 +1,73 @@
+import os, time
+from collections import namedtuple
+
+# Data files
+snpFilePath = 'snpData-chr{0}.txt'
+lociFilePath = 'lociData-chr{0}.txt'
+
+# Size of each buffered read from the data files (bytes)
+BUFFER_SIZE = 4 * 1024 * 1024
+
+# Typed records yielded by the readers
+Snp = namedtuple('Snp', ['rsid', 'chr', 'hasSig'])
+Locus = namedtuple('Locus', ['rsid', 'mrnaAcc', 'gene', 'locusClass'])
+
+def chromosomeFilePaths(path, curChr):
+    # Return the SNP and loci file paths for a chromosome
+    curSnpFilePath = snpFilePath.format(curChr)
+    curLociFilePath = lociFilePath.format(curChr)
+    if len(path) > 0:
+        curSnpFilePath = os.path.join(path, curSnpFilePath)
+        curLociFilePath = os.path.join(path, curLociFilePath)
+    return curSnpFilePath, curLociFilePath
+
+def batches(records, size):
+    # Group any iterable into lists of at most size items
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class DataReader:
+    # Streams typed records from a tab-delimited data file. Lines are read
+    # and parsed a block at a time; parseTime accumulates the time spent
+    # reading/parsing (not the time the consumer spends on each record) and
+    # count holds the number of records yielded so far.
+    def __init__(self, filePath, bufferSize=BUFFER_SIZE):
+        self.filePath = filePath
+        self.bufferSize = bufferSize
+        self.parseTime = 0
+        self.count = 0
+
+    def __iter__(self):
+        with open(self.filePath, 'r', self.bufferSize) as dataFile:
+            while True:
+                parseStart = time.time()
+                lines = dataFile.readlines(self.bufferSize)
+                if not lines:
+                    self.parseTime += time.time() - parseStart
+                    break
+                records = self.parseLines(lines)
+                self.parseTime += time.time() - parseStart
+                self.count += len(records)
+                for record in records:
+                    yield record
+
+    def parseLines(self, lines):
+        raise NotImplementedError
+
+class SnpReader(DataReader):
+    # rsid, chromosome, clinical significance
+    def parseLines(self, lines):
+        rows = [line.rstrip('\r\n').split('\t') for line in lines]
+        return [Snp(row[0], row[1], row[2] != '' and row[2] != 'false') for row in rows if len(row) == 3]
+
+class LociReader(DataReader):
+    # rsid, mRNA accession, gene, class
+    def parseLines(self, lines):
+        rows = [line.rstrip('\r\n').split('\t') for line in lines]
+        return [Locus(row[0], row[1], row[2], row[3]) for row in rows if len(row) == 4]
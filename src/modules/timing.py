@@ -0,0 +1,114 @@
+import ctypes, ctypes.util, math, sys, time
+from result import Result
+
+# clock_gettime clock id of CLOCK_MONOTONIC on Linux
+CLOCK_MONOTONIC = 1
+
+class Timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+def monotonicClock():
+    # clockNs over clock_gettime(CLOCK_MONOTONIC) from libc, or None where
+    # it is not available
+    if not sys.platform.startswith('linux'):
+        return None
+    for name in ['c', 'rt']:
+        try:
+            clockGettime = ctypes.CDLL(ctypes.util.find_library(name), use_errno=True).clock_gettime
+        except (OSError, AttributeError):
+            continue
+        def clockNs():
+            timespec = Timespec()
+            if clockGettime(CLOCK_MONOTONIC, ctypes.byref(timespec)) != 0:
+                raise OSError(ctypes.get_errno(), "clock_gettime failed")
+            return timespec.tv_sec * 1000000000 + timespec.tv_nsec
+        return clockNs
+    return None
+
+# Monotonic nanosecond clock: perf_counter_ns or perf_counter where the
+# interpreter has them, otherwise CLOCK_MONOTONIC through ctypes (Python 2
+# on Linux). The last resort is time.time, which is not monotonic: a clock
+# step during a run skews the samples taken across it.
+if hasattr(time, 'perf_counter_ns'):
+    clockNs = time.perf_counter_ns
+elif hasattr(time, 'perf_counter'):
+    def clockNs():
+        return int(time.perf_counter() * 1000000000)
+else:
+    clockNs = monotonicClock()
+    if clockNs is None:
+        def clockNs():
+            return int(time.time() * 1000000000)
+
+# Query types, matching the Result query columns
+QUERY_TYPES = ['qryByRsid', 'qryByClinSig', 'qryByGene', 'qryByGeneSig']
+
+# Summary statistics, in the order they are reported
+STATISTICS = ['min', 'median', 'p95', 'p99', 'mean', 'stddev']
+
+def percentile(sortedSamples, pct):
+    # Linear interpolation between closest ranks
+    if len(sortedSamples) == 1:
+        return sortedSamples[0]
+    rank = (len(sortedSamples) - 1) * pct / 100.0
+    lower = int(math.floor(rank))
+    upper = min(lower + 1, len(sortedSamples) - 1)
+    return sortedSamples[lower] + (sortedSamples[upper] - sortedSamples[lower]) * (rank - lower)
+
+def summarize(samples):
+    # Statistics in seconds for a list of nanosecond samples
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    mean = float(sum(ordered)) / len(ordered)
+    variance = 0.0
+    if len(ordered) > 1:
+        variance = sum([(s - mean) ** 2 for s in ordered]) / (len(ordered) - 1)
+    stats = {'min': ordered[0], 'median': percentile(ordered, 50), 'p95': percentile(ordered, 95),
+             'p99': percentile(ordered, 99), 'mean': mean, 'stddev': math.sqrt(variance)}
+    for name in stats:
+        stats[name] = stats[name] / 1e9
+    stats['count'] = len(ordered)
+    return stats
+
+class QueryTimer:
+    # Times queries with clockNs and keeps the samples for each query type,
+    # discarding the first `warmup` samples of each type
+    def __init__(self, warmup=0):
+        self.warmup = warmup
+        self.seen = {}
+        self.samples = {}
+
+    def time(self, queryType, func, *args):
+        # Run func(*args), record it under queryType and return the elapsed
+        # time in seconds
+        queryStart = clockNs()
+        func(*args)
+        elapsed = clockNs() - queryStart
+        self.record(queryType, elapsed)
+        return elapsed / 1e9
+
+    def record(self, queryType, elapsedNs):
+        self.seen[queryType] = self.seen.get(queryType, 0) + 1
+        if self.seen[queryType] > self.warmup:
+            self.samples.setdefault(queryType, []).append(elapsedNs)
+
+    def isWarm(self, queryType):
+        return self.seen.get(queryType, 0) > self.warmup
+
+    def summary(self, queryType):
+        return summarize(self.samples.get(queryType, []))
+
+    def summaryResults(self, method, tag, queryTypes=QUERY_TYPES):
+        # One result row per statistic, with a column per query type
+        summaries = dict([(queryType, self.summary(queryType)) for queryType in queryTypes])
+        results = []
+        for statistic in STATISTICS:
+            result = Result()
+            result.method = method + "-" + statistic
+            result.tag = tag
+            for queryType in queryTypes:
+                if summaries[queryType] is not None:
+                    setattr(result, queryType, summaries[queryType][statistic])
+            results.append(result)
+        return results
@@ -0,0 +1,31 @@
+# Chromosome list, in load order
+CHROMOSOMES = ["1","2","3","4","5","6","7","8","9","10","11","12","13","14","15","16","17","18","19","20","21","22","X","Y","MT"]
+DEV_CHROMOSOMES = ["21"]
+
+# Gene list for the query set runs
+GENES = ["ACSL6","ZDHHC8","TPH1","SYN2","DISC1","DISC2","COMT","FXYD6","ERBB4","DAOA","MEGF10","SLC18A1","DYM","SREBF2","NXRN1","CSF2RA","IL3RA","DRD2"]
+
+# Parameters for the single query runs
+QUERY_RSID = "rs8788"
+QUERY_GENE = "GRIN2B"
+QUERY_CLASS = "missense"
+
+def chromosomeList(dev, start="1"):
+    # Chromosomes to load; in dev mode only chromosome 21. Allow restart from
+    # anywhere in the chromosome list, sequentially as ordered above.
+    if dev:
+        return list(DEV_CHROMOSOMES)
+    if start not in CHROMOSOMES:
+        raise ValueError("Unknown start chromosome " + str(start))
+    return CHROMOSOMES[CHROMOSOMES.index(start):]
+
+def queryParams(queryType, gene=QUERY_GENE, rsid=QUERY_RSID):
+    # Parameters a backend's (or the bitmaps') runQuery needs for each query
+    # type
+    if queryType == 'qryByRsid':
+        return {"rsid": rsid}
+    if queryType in ('qryByGene', 'qryByGeneSig'):
+        return {"gene": gene}
+    if queryType == 'qryByGeneClassSig':
+        return {"gene": gene, "locusClass": QUERY_CLASS}
+    return {}
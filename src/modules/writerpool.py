@@ -0,0 +1,59 @@
+import threading, time
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+class WorkerStats:
+    # Batches written by one writer thread: (sequence, items, info, latency)
+    def __init__(self, workerId):
+        self.workerId = workerId
+        self.items = 0
+        self.busyTime = 0
+        self.batches = []
+
+class WriterPool:
+    # Feeds batches to writer threads through a bounded queue so the producer
+    # (parsing/assembly) blocks instead of buffering when the writers fall
+    # behind. writeBatch must be safe to call from several threads.
+    def __init__(self, writeBatch, workers, queueSize=None):
+        self.writeBatch = writeBatch
+        self.queue = queue.Queue(queueSize or workers * 2)
+        self.stats = [WorkerStats(i + 1) for i in range(workers)]
+        self.errors = []
+        self.sequence = 0
+        self.threads = []
+        for stats in self.stats:
+            thread = threading.Thread(target=self.run, args=(stats,))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def run(self, stats):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            sequence, batch, info = item
+            batchStart = time.time()
+            try:
+                self.writeBatch(batch)
+            except Exception as e:
+                self.errors.append(e)
+            latency = time.time() - batchStart
+            stats.items += len(batch)
+            stats.busyTime += latency
+            stats.batches.append((sequence, len(batch), info, latency))
+
+    def submit(self, batch, info=None):
+        self.sequence += 1
+        self.queue.put((self.sequence, batch, info))
+
+    def close(self):
+        # Wait for all queued batches, then re-raise the first writer error
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
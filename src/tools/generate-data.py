@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+import argparse
+import os, sys, time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'modules'))
+from snpreader import chromosomeFilePaths
+from datagen import DataProfile, rsidStarts, writeChromosome
+from parallel import loadInParallel
+from workload import chromosomeList, GENES, QUERY_GENE, CHROMOSOMES
+
+# Get command line arguments
+parser = argparse.ArgumentParser(description='Generate synthetic SNP and locus data files from a sample chromosome')
+parser.add_argument('--sample', help='Path to the sample data files (default: res)')
+parser.add_argument('--samplechr', type=str, help='Chromosome of the sample data files (default: 21)')
+parser.add_argument('--out', help='Path to write the generated data files')
+parser.add_argument('--scale', type=float, help='Scale factor relative to the sample, e.g. 1 to 100')
+parser.add_argument('--base', type=int, help='SNPs on the sample chromosome at 1x (default: sample size)')
+parser.add_argument('--dev', action='store_true', help='Only generate chromosome 21')
+parser.add_argument('--seed', type=int, help='Random seed')
+parser.add_argument('--jobs', type=int, help='Number of chromosomes to generate concurrently in worker processes')
+args = parser.parse_args()
+
+# Set default variables
+samplePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'res')
+sampleChr = '21'
+outPath = ''
+scale = 1.0
+baseSnps = None
+dev = False
+seed = 1
+jobs = 1
+
+# Update any present from CLI
+if args.sample is not None: # Path to the sample data files
+    samplePath = args.sample
+if args.samplechr is not None: # Chromosome of the sample data files
+    sampleChr = args.samplechr
+if args.out is not None: # Path to write the generated data files
+    outPath = args.out
+if args.scale is not None: # Scale factor relative to the sample
+    scale = args.scale
+if args.base is not None: # SNPs on the sample chromosome at 1x
+    baseSnps = args.base
+if args.dev:
+    dev = True
+if args.seed is not None: # Random seed
+    seed = args.seed
+if args.jobs is not None and args.jobs > 1: # Parallel chromosome generation
+    jobs = args.jobs
+
+if outPath != '' and not os.path.isdir(outPath):
+    os.makedirs(outPath)
+
+# Learn distributions from the sample chromosome
+sampleSnpFilePath, sampleLociFilePath = chromosomeFilePaths(samplePath, sampleChr)
+profile = DataProfile(sampleSnpFilePath, sampleLociFilePath)
+print "Sample chromosome " + sampleChr + ": " + str(profile.snpCount) + " SNPs, " + str(len(profile.geneNames)) + " genes, has_sig ratio " + str(profile.hasSigRatio)
+
+# rsid ranges are laid out over the full chromosome list, so a chromosome's
+# data is the same whichever chromosomes are generated
+allSnpCounts = [(curChr, profile.chromosomeSnps(curChr, scale, baseSnps)) for curChr in CHROMOSOMES]
+firstRsids = rsidStarts(profile, allSnpCounts)
+chromosomes = chromosomeList(dev)
+snpCounts = [(curChr, snpCount) for curChr, snpCount in allSnpCounts if curChr in chromosomes]
+
+# Place each query workload gene on one chromosome, in chromosome order,
+# so the gene queries find data at every scale
+workloadGenes = dict([(curChr, []) for curChr in CHROMOSOMES])
+for i, gene in enumerate([QUERY_GENE] + GENES):
+    workloadGenes[CHROMOSOMES[i % len(CHROMOSOMES)]].append(gene)
+
+def generateChromosome(chromosomeSnps):
+    # Worker process entry point for --jobs; each chromosome has its own
+    # seed so the output does not depend on the number of jobs
+    curChr, snpCount = chromosomeSnps
+    chrSeed = seed * 1000 + CHROMOSOMES.index(curChr)
+    generateStart = time.time()
+    snpRows, lociRows = writeChromosome(profile, curChr, snpCount, firstRsids[curChr], outPath, chrSeed, workloadGenes[curChr])
+    return curChr, snpRows, lociRows, time.time() - generateStart
+
+runStart = time.time()
+if jobs > 1:
+    generated = loadInParallel(generateChromosome, snpCounts, jobs)
+else:
+    generated = (generateChromosome(chromosomeSnps) for chromosomeSnps in snpCounts)
+
+totalSnps = 0
+totalLoci = 0
+for curChr, snpRows, lociRows, elapsed in generated:
+    print "Chromosome " + curChr + ": " + str(snpRows) + " SNPs, " + str(lociRows) + " loci in " + str(elapsed) + "s"
+    sys.stdout.flush()
+    totalSnps += snpRows
+    totalLoci += lociRows
+
+elapsed = time.time() - runStart
+print "Generated " + str(totalSnps) + " SNPs and " + str(totalLoci) + " loci in " + str(elapsed) + "s (" + str(int((totalSnps + totalLoci) / max(elapsed, 0.001))) + " rows/s)"